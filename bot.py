@@ -5,22 +5,47 @@ A modular habit tracking and rewards bot for Telegram.
 Features: Habit tracking, points system, reward shop, group management, and leaderboards.
 """
 
-import os
+import re
+import queue
+import importlib
+import atexit
 import logging
+import logging.handlers
 import asyncio
+import secrets
 import warnings
-from dotenv import load_dotenv
 from telegram import Update
+from telegram.request import HTTPXRequest
 from telegram.ext import (
+    AIORateLimiter,
     Application,
+    ApplicationHandlerStop,
     CommandHandler,
     CallbackQueryHandler,
+    ContextTypes,
     ConversationHandler,
     MessageHandler,
+    PicklePersistence,
     filters,
 )
 from telegram.warnings import PTBUserWarning
 
+from config import CFG
+
+# Fail fast on a missing token, before the handler modules (and their DB setup) load
+if not CFG.token:
+    raise ValueError("No TELEGRAM_BOT_TOKEN found in environment variables")
+
+try:
+    # libuv-based event loop, noticeably faster for many small HTTP round-trips
+    from uvloop import new_event_loop
+except ImportError:
+    from asyncio import new_event_loop
+from database import Database, POINT_TYPES, close_connections
+from utils.announcements import GROUP_CHAT_IDS
+from utils.update_processor import PerUserUpdateProcessor
+from utils.db_executor import DB_EXECUTOR
+
 # Import constants
 from constants import (
     CREATING_GROUP, JOINING_GROUP, ADDING_HABIT, ADDING_HABIT_TYPE,
@@ -59,8 +84,6 @@ from handlers import (
     # Points
     convert_points_start, convert_points_select_to,
     convert_points_select_amount, convert_points_finish,
-    # Reports
-    monthly_report, monthlyreport,
     # Town Mall
     town_mall, view_town_mall_item, buy_town_mall_item,
     town_mall_purchase_history, town_mall_my_items,
@@ -69,216 +92,338 @@ from handlers import (
     town_mall_dummy_callback
 )
 
-# Load environment variables
-load_dotenv()
-
-# Suppress PTBUserWarning about per_message in ConversationHandler
+# Conversations are tracked per chat/user on purpose (per_message=False); PTB still
+# warns about that once per ConversationHandler that has callback query handlers
 warnings.filterwarnings("ignore", category=PTBUserWarning, message=".*per_message.*")
 
-# Enable logging
-logging.basicConfig(
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    level=logging.INFO
-)
+# Enable logging - records are queued and written to stderr by a background thread,
+# so handlers never block the event loop on log I/O
+_log_queue = queue.SimpleQueue()
+_log_output = logging.StreamHandler()
+_log_output.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+_root_logger = logging.getLogger()
+_root_logger.setLevel(logging.INFO)
+_root_logger.addHandler(logging.handlers.QueueHandler(_log_queue))
+_log_listener = logging.handlers.QueueListener(_log_queue, _log_output, respect_handler_level=True)
+_log_listener.start()
+atexit.register(_log_listener.stop)
+
 logger = logging.getLogger(__name__)
 
+db = Database()
 
-def main():
-    """Start the bot"""
-    token = os.getenv('TELEGRAM_BOT_TOKEN')
-    if not token:
-        raise ValueError("No TELEGRAM_BOT_TOKEN found in environment variables")
 
-    application = Application.builder().token(token).build()
+def callback_pattern(regex):
+    """Compile a callback_data pattern once; callback data is always ASCII"""
+    return re.compile(regex, re.ASCII)
 
-    # Command handlers
-    application.add_handler(CommandHandler("start", start))
-    application.add_handler(CommandHandler("menu", menu))
-    application.add_handler(CommandHandler("setgroupchat", setgroupchat))
-    application.add_handler(CommandHandler("monthlyreport", monthlyreport))
 
-    # Group creation conversation
-    create_group_conv = ConversationHandler(
-        entry_points=[CallbackQueryHandler(create_group_start, pattern="^create_group$")],
-        states={
-            CREATING_GROUP: [MessageHandler(filters.TEXT & ~filters.COMMAND, create_group_finish)],
-        },
-        fallbacks=[CommandHandler("cancel", cancel)],
-        allow_reentry=True,
-    )
-    application.add_handler(create_group_conv)
+def _lazy(path):
+    """Stand-in for handlers.<module>.<name> that imports the module on first call"""
+    module_name, name = path.split('.')
+    handler = None
 
-    # Join group conversation
-    join_group_conv = ConversationHandler(
-        entry_points=[CallbackQueryHandler(join_group_start, pattern="^join_group$")],
-        states={
-            JOINING_GROUP: [MessageHandler(filters.TEXT & ~filters.COMMAND, join_group_finish)],
-        },
-        fallbacks=[CommandHandler("cancel", cancel)],
-        allow_reentry=True,
-    )
-    application.add_handler(join_group_conv)
+    async def call(update: Update, context: ContextTypes.DEFAULT_TYPE):
+        nonlocal handler
+        if handler is None:
+            handler = getattr(importlib.import_module(f"handlers.{module_name}"), name)
+        return await handler(update, context)
 
-    # Add habit conversation
-    add_habit_conv = ConversationHandler(
-        entry_points=[CallbackQueryHandler(add_habit_start, pattern="^add_habit$")],
-        states={
-            ADDING_HABIT: [MessageHandler(filters.TEXT & ~filters.COMMAND, add_habit_get_name)],
-            ADDING_HABIT_TYPE: [CallbackQueryHandler(add_habit_finish, pattern=r"^habittype_\w+$")],
-        },
-        fallbacks=[CommandHandler("cancel", cancel)],
-        allow_reentry=True,
-    )
-    application.add_handler(add_habit_conv)
+    return call
 
-    # Edit habit conversation
-    edit_habit_conv = ConversationHandler(
-        entry_points=[CallbackQueryHandler(edit_habit_start, pattern=r"^edit_habit_\d+$")],
-        states={
-            EDITING_HABIT: [MessageHandler(filters.TEXT & ~filters.COMMAND, edit_habit_get_name)],
-            EDITING_HABIT_TYPE: [CallbackQueryHandler(edit_habit_finish, pattern=r"^habittype_\w+$")],
-        },
-        fallbacks=[CommandHandler("cancel", cancel)],
-        allow_reentry=True,
-    )
-    application.add_handler(edit_habit_conv)
 
-    # Add reward conversation
-    add_reward_conv = ConversationHandler(
-        entry_points=[CallbackQueryHandler(add_reward_start, pattern="^add_reward$")],
-        states={
-            ADDING_REWARD: [MessageHandler(filters.TEXT & ~filters.COMMAND, add_reward_get_details)],
-            ADDING_REWARD_TYPE: [CallbackQueryHandler(add_reward_finish, pattern=r"^habittype_\w+$")],
-        },
-        fallbacks=[CommandHandler("cancel", cancel)],
-        allow_reentry=True,
-    )
-    application.add_handler(add_reward_conv)
+# Shared across all conversations instead of being rebuilt per handler
+TEXT_FILTER = filters.TEXT & ~filters.COMMAND
+PHOTO_FILTER = filters.PHOTO
+CANCEL_FALLBACKS = [CommandHandler("cancel", cancel)]
+HABIT_TYPE_PATTERN = r"^habittype_\w+$"
+
+
+def make_conv(name, entry_pattern, entry_callback, states, allow_reentry=False):
+    """Build a persistent conversation entered from a callback button.
 
-    # Point conversion conversation
-    convert_points_conv = ConversationHandler(
-        entry_points=[CallbackQueryHandler(convert_points_start, pattern="^convert_points$")],
+    states maps each state to (pattern_or_filter, callback) pairs: a pattern
+    string becomes a CallbackQueryHandler, a filter becomes a MessageHandler.
+
+    Conversations block: their callbacks run inside the update, under the
+    per-user lock of PerUserUpdateProcessor, so a quick second reply (name, then
+    price) waits for the first step instead of being dropped by PTB while the
+    previous state is still pending. Other users are unaffected.
+    """
+    def state_handler(trigger, callback):
+        if isinstance(trigger, str):
+            return CallbackQueryHandler(callback, pattern=callback_pattern(trigger))
+        return MessageHandler(trigger, callback)
+
+    return ConversationHandler(
+        entry_points=[CallbackQueryHandler(entry_callback, pattern=callback_pattern(entry_pattern))],
         states={
-            CONVERTING_POINTS_FROM: [CallbackQueryHandler(convert_points_select_to, pattern=r"^convertfrom_\w+$")],
-            CONVERTING_POINTS_TO: [CallbackQueryHandler(convert_points_select_amount, pattern=r"^convertto_\w+$")],
-            CONVERTING_POINTS_AMOUNT: [MessageHandler(filters.TEXT & ~filters.COMMAND, convert_points_finish)],
+            state: [state_handler(trigger, callback) for trigger, callback in handlers]
+            for state, handlers in states.items()
         },
-        fallbacks=[CommandHandler("cancel", cancel)],
-        allow_reentry=True,
+        fallbacks=CANCEL_FALLBACKS,
+        allow_reentry=allow_reentry,
+        per_chat=True,
+        per_user=True,
+        per_message=False,
+        block=True,
+        name=name,
+        persistent=True,
     )
-    application.add_handler(convert_points_conv)
-
-    # Callback query handlers - Habits
-    application.add_handler(CallbackQueryHandler(my_habits, pattern="^my_habits$"))
-    application.add_handler(CallbackQueryHandler(yesterday_habits, pattern="^yesterday_habits$"))
-    application.add_handler(CallbackQueryHandler(toggle_habit, pattern=r"^toggle_habit_\d+$"))
-    application.add_handler(CallbackQueryHandler(toggle_yesterday_habit, pattern=r"^toggle_yesterday_\d+$"))
-    application.add_handler(CallbackQueryHandler(manage_habits, pattern="^manage_habits$"))
-    application.add_handler(CallbackQueryHandler(edit_habit_list, pattern="^edit_habit_list$"))
-    application.add_handler(CallbackQueryHandler(delete_habit_list, pattern="^delete_habit_list$"))
-    application.add_handler(CallbackQueryHandler(delete_habit_confirm, pattern=r"^confirm_delete_habit_\d+$"))
 
-    # Stats and calendar
-    application.add_handler(CallbackQueryHandler(my_stats, pattern="^my_stats$"))
-    application.add_handler(CallbackQueryHandler(calendar_view, pattern="^calendar_view$"))
-    application.add_handler(CallbackQueryHandler(habit_calendar_view, pattern=r"^habit_calendar_\d+$"))
 
+# Plain (non-conversation) callback buttons, keyed by route.
+# Callback data is either the route itself or "<route>_<id>"; handlers parse the id.
+CALLBACK_ROUTES = {
+    # Habits
+    'my_habits': my_habits,
+    'yesterday_habits': yesterday_habits,
+    'toggle_habit': toggle_habit,
+    'toggle_yesterday': toggle_yesterday_habit,
+    'manage_habits': manage_habits,
+    'edit_habit_list': edit_habit_list,
+    'delete_habit_list': delete_habit_list,
+    'confirm_delete_habit': delete_habit_confirm,
+    # Stats and calendar
+    'my_stats': my_stats,
+    'calendar_view': calendar_view,
+    'habit_calendar': habit_calendar_view,
     # Groups and reports
-    application.add_handler(CallbackQueryHandler(group_info, pattern="^group_info$"))
-    application.add_handler(CallbackQueryHandler(todays_stats, pattern="^todays_stats$"))
-    application.add_handler(CallbackQueryHandler(view_user_stats, pattern=r"^view_user_stats_\d+$"))
-    application.add_handler(CallbackQueryHandler(monthly_report, pattern="^monthly_report$"))
-
+    'group_info': group_info,
+    'todays_stats': todays_stats,
+    'view_user_stats': view_user_stats,
+    'monthly_report': _lazy('reports.monthly_report'),
     # Reward shop
-    application.add_handler(CallbackQueryHandler(reward_shop, pattern="^reward_shop$"))
-    application.add_handler(CallbackQueryHandler(view_shop, pattern=r"^view_shop_\d+$"))
-    application.add_handler(CallbackQueryHandler(bazar, pattern="^bazar$"))
-    application.add_handler(CallbackQueryHandler(bazar_own_item, pattern=r"^bazar_own_\d+$"))
-    application.add_handler(CallbackQueryHandler(buy_reward, pattern=r"^buy_reward_\d+$"))
-
-    # Payment selection handlers (for 'any' rewards)
-    application.add_handler(CallbackQueryHandler(payment_select_type, pattern=r"^payselect_\w+$"))
-    application.add_handler(CallbackQueryHandler(payment_add_amount, pattern=r"^payamount_"))
-    application.add_handler(CallbackQueryHandler(show_payment_screen, pattern="^payback$"))
-    application.add_handler(CallbackQueryHandler(payment_clear, pattern="^payclear$"))
-    application.add_handler(CallbackQueryHandler(payment_confirm, pattern="^payconfirm$"))
-
+    'reward_shop': reward_shop,
+    'view_shop': view_shop,
+    'bazar': bazar,
+    'bazar_own': bazar_own_item,
+    'buy_reward': buy_reward,
+    # Payment selection (for 'any' rewards): payselect_<type>, payamount_<type>_<amount>
+    **{f'payselect_{ptype}': payment_select_type for ptype in POINT_TYPES},
+    **{f'payamount_{ptype}': payment_add_amount for ptype in POINT_TYPES},
+    'payback': show_payment_screen,
+    'payclear': payment_clear,
+    'payconfirm': payment_confirm,
     # My rewards
-    application.add_handler(CallbackQueryHandler(my_rewards, pattern="^my_rewards$"))
-    application.add_handler(CallbackQueryHandler(edit_reward_list, pattern="^edit_reward_list$"))
-    application.add_handler(CallbackQueryHandler(edit_reward_select, pattern=r"^edit_reward_select_\d+$"))
-    application.add_handler(CallbackQueryHandler(delete_reward_list, pattern="^delete_reward_list$"))
-    application.add_handler(CallbackQueryHandler(delete_reward_confirm, pattern=r"^confirm_delete_reward_\d+$"))
-
-    # Edit reward - Name conversation
-    edit_reward_name_conv = ConversationHandler(
-        entry_points=[CallbackQueryHandler(edit_reward_name_start, pattern=r"^edit_reward_name_\d+$")],
-        states={
-            EDITING_REWARD_NAME: [MessageHandler(filters.TEXT & ~filters.COMMAND, edit_reward_name_finish)],
-        },
-        fallbacks=[CommandHandler("cancel", cancel)],
-    )
-    application.add_handler(edit_reward_name_conv)
+    'my_rewards': my_rewards,
+    'edit_reward_list': edit_reward_list,
+    'edit_reward_select': edit_reward_select,
+    'delete_reward_list': delete_reward_list,
+    'confirm_delete_reward': delete_reward_confirm,
+    # Town Mall
+    'town_mall': town_mall,
+    'townmall_view': view_town_mall_item,
+    'townmall_buy': buy_town_mall_item,
+    'townmall_history': town_mall_purchase_history,
+    'townmall_my_items': town_mall_my_items,
+    'townmall_unavailable': town_mall_dummy_callback,
+    'townmall_outofstock': town_mall_dummy_callback,
+    'townmall_notenough': town_mall_dummy_callback,
+    # Common
+    'back_to_menu': back_to_menu,
+}
+# Read-only views: run as background tasks so they never hold up the update queue
+NON_BLOCKING_ROUTES = frozenset({
+    'my_stats', 'calendar_view', 'habit_calendar',
+    'group_info', 'todays_stats', 'view_user_stats', 'monthly_report',
+    'reward_shop', 'view_shop', 'bazar', 'my_rewards',
+    'town_mall', 'townmall_view', 'townmall_history', 'townmall_my_items',
+})
+
+
+def resolve_route(data):
+    """Map callback data to its route without a regex: exact match first, then "<route>_<id>" """
+    if data in CALLBACK_ROUTES:
+        return data
+    route, _, tail = data.rpartition('_')
+    if tail.isdecimal() and route in CALLBACK_ROUTES:
+        return route
+    return None
+
+
+async def dispatch_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Route a callback query to its handler with a single dict lookup.
+
+    Runs in handler group -1 for every string callback; data that isn't a known
+    route returns without stopping, so it falls through to the conversations in
+    group 0.
+    """
+    route = resolve_route(update.callback_query.data)
+    if route is None:
+        return
+    callback = CALLBACK_ROUTES[route]
+    if route in NON_BLOCKING_ROUTES:
+        context.application.create_task(callback(update, context), update=update)
+    else:
+        await callback(update, context)
+    raise ApplicationHandlerStop
+
+# The only update kinds any handler consumes; everything else is filtered out by
+# Telegram for both getUpdates and the webhook. Edited messages are left out on
+# purpose so an edit isn't taken as a new answer inside a conversation.
+ALLOWED_UPDATES = [Update.MESSAGE, Update.CALLBACK_QUERY]
+
+
+async def post_init(application: Application):
+    """Warm caches before the first update instead of on the first request"""
+    application.bot_data[GROUP_CHAT_IDS] = await asyncio.to_thread(db.get_group_chat_ids)
+    logger.info(f"Preloaded chat links for {len(application.bot_data[GROUP_CHAT_IDS])} groups")
+
+
+async def post_shutdown(application: Application):
+    """Let in-flight DB calls finish, then close the long-lived SQLite connections"""
+    await asyncio.to_thread(DB_EXECUTOR.shutdown, wait=True)
+    close_connections()
 
-    # Edit reward - Price conversation
-    edit_reward_price_conv = ConversationHandler(
-        entry_points=[CallbackQueryHandler(edit_reward_price_start, pattern=r"^edit_reward_price_\d+$")],
-        states={
-            EDITING_REWARD_PRICE: [MessageHandler(filters.TEXT & ~filters.COMMAND, edit_reward_price_finish)],
-        },
-        fallbacks=[CommandHandler("cancel", cancel)],
-    )
-    application.add_handler(edit_reward_price_conv)
 
-    # Town Mall - Add item conversation
-    add_townmall_item_conv = ConversationHandler(
-        entry_points=[CallbackQueryHandler(town_mall_add_start, pattern="^townmall_add$")],
-        states={
-            ADDING_TOWNMALL_ITEM: [MessageHandler(filters.TEXT & ~filters.COMMAND, town_mall_add_get_details)],
-            ADDING_TOWNMALL_PHOTO: [
-                MessageHandler(filters.PHOTO, town_mall_add_photo),
-                MessageHandler(filters.TEXT & ~filters.COMMAND, town_mall_add_photo),
-            ],
-        },
-        fallbacks=[CommandHandler("cancel", cancel)],
+def main():
+    """Start the bot"""
+    # Keep user_data/bot_data and conversation states across restarts
+    persistence = PicklePersistence(filepath="bot_state.pkl", update_interval=30)
+
+    # Large keep-alive HTTP/2 pool for outgoing calls so notification bursts reuse
+    # warm connections; getUpdates only ever needs one connection
+    request = HTTPXRequest(
+        connection_pool_size=256,
+        http_version="2",
+        pool_timeout=5,
+        read_timeout=15,
+        write_timeout=15,
+        connect_timeout=5,
     )
-    application.add_handler(add_townmall_item_conv)
-
-    # Town Mall - Edit item conversation
-    edit_townmall_item_conv = ConversationHandler(
-        entry_points=[CallbackQueryHandler(town_mall_edit_start, pattern=r"^townmall_edit_\d+$")],
-        states={
-            EDITING_TOWNMALL_ITEM: [MessageHandler(filters.TEXT & ~filters.COMMAND, town_mall_edit_get_details)],
-            EDITING_TOWNMALL_PHOTO: [
-                MessageHandler(filters.PHOTO, town_mall_edit_photo),
-                MessageHandler(filters.TEXT & ~filters.COMMAND, town_mall_edit_photo),
-            ],
-        },
-        fallbacks=[CommandHandler("cancel", cancel)],
+    get_updates_request = HTTPXRequest(connection_pool_size=1, http_version="2")
+
+    application = (
+        Application.builder()
+        .token(CFG.token)
+        .request(request)
+        .get_updates_request(get_updates_request)
+        .persistence(persistence)
+        .post_init(post_init)
+        .post_shutdown(post_shutdown)
+        .concurrent_updates(PerUserUpdateProcessor(32))
+        # Stay just under Telegram's 30 msg/s overall and 20 msg/min per group chat limits
+        .rate_limiter(AIORateLimiter(
+            overall_max_rate=28,
+            overall_time_period=1,
+            group_max_rate=18,
+            group_time_period=60,
+            max_retries=3,
+        ))
+        .build()
     )
-    application.add_handler(edit_townmall_item_conv)
-
-    # Town Mall
-    application.add_handler(CallbackQueryHandler(town_mall, pattern="^town_mall$"))
-    application.add_handler(CallbackQueryHandler(view_town_mall_item, pattern=r"^townmall_view_\d+$"))
-    application.add_handler(CallbackQueryHandler(buy_town_mall_item, pattern=r"^townmall_buy_\d+$"))
-    application.add_handler(CallbackQueryHandler(town_mall_purchase_history, pattern="^townmall_history$"))
-    application.add_handler(CallbackQueryHandler(town_mall_my_items, pattern="^townmall_my_items$"))
-    application.add_handler(CallbackQueryHandler(town_mall_dummy_callback, pattern="^townmall_(unavailable|outofstock|notenough)$"))
-
-    # Common handlers
-    application.add_handler(CallbackQueryHandler(back_to_menu, pattern="^back_to_menu$"))
 
-    # Start the bot
-    logger.info("Bot started")
-    application.run_polling(allowed_updates=Update.ALL_TYPES)
+    # Commands and conversations (default group 0), registered in one call
+    application.add_handlers([
+        CommandHandler("start", start),
+        CommandHandler("menu", menu),
+        CommandHandler("setgroupchat", setgroupchat),
+        CommandHandler("monthlyreport", _lazy('reports.monthlyreport')),
+
+        # Conversations
+        make_conv(
+            "create_group", r"^create_group$", create_group_start,
+            {CREATING_GROUP: [(TEXT_FILTER, create_group_finish)]},
+            allow_reentry=True,
+        ),
+        make_conv(
+            "join_group", r"^join_group$", join_group_start,
+            {JOINING_GROUP: [(TEXT_FILTER, join_group_finish)]},
+            allow_reentry=True,
+        ),
+        make_conv(
+            "add_habit", r"^add_habit$", add_habit_start,
+            {
+                ADDING_HABIT: [(TEXT_FILTER, add_habit_get_name)],
+                ADDING_HABIT_TYPE: [(HABIT_TYPE_PATTERN, add_habit_finish)],
+            },
+            allow_reentry=True,
+        ),
+        make_conv(
+            "edit_habit", r"^edit_habit_\d+$", edit_habit_start,
+            {
+                EDITING_HABIT: [(TEXT_FILTER, edit_habit_get_name)],
+                EDITING_HABIT_TYPE: [(HABIT_TYPE_PATTERN, edit_habit_finish)],
+            },
+            allow_reentry=True,
+        ),
+        make_conv(
+            "add_reward", r"^add_reward$", add_reward_start,
+            {
+                ADDING_REWARD: [(TEXT_FILTER, add_reward_get_details)],
+                ADDING_REWARD_TYPE: [(HABIT_TYPE_PATTERN, add_reward_finish)],
+            },
+            allow_reentry=True,
+        ),
+        make_conv(
+            "convert_points", r"^convert_points$", convert_points_start,
+            {
+                CONVERTING_POINTS_FROM: [(r"^convertfrom_\w+$", convert_points_select_to)],
+                CONVERTING_POINTS_TO: [(r"^convertto_\w+$", convert_points_select_amount)],
+                CONVERTING_POINTS_AMOUNT: [(TEXT_FILTER, convert_points_finish)],
+            },
+            allow_reentry=True,
+        ),
+        make_conv(
+            "edit_reward_name", r"^edit_reward_name_\d+$", edit_reward_name_start,
+            {EDITING_REWARD_NAME: [(TEXT_FILTER, edit_reward_name_finish)]},
+        ),
+        make_conv(
+            "edit_reward_price", r"^edit_reward_price_\d+$", edit_reward_price_start,
+            {EDITING_REWARD_PRICE: [(TEXT_FILTER, edit_reward_price_finish)]},
+        ),
+        make_conv(
+            "add_townmall_item", r"^townmall_add$", town_mall_add_start,
+            {
+                ADDING_TOWNMALL_ITEM: [(TEXT_FILTER, town_mall_add_get_details)],
+                ADDING_TOWNMALL_PHOTO: [(PHOTO_FILTER, town_mall_add_photo), (TEXT_FILTER, town_mall_add_photo)],
+            },
+        ),
+        make_conv(
+            "edit_townmall_item", r"^townmall_edit_\d+$", town_mall_edit_start,
+            {
+                EDITING_TOWNMALL_ITEM: [(TEXT_FILTER, town_mall_edit_get_details)],
+                EDITING_TOWNMALL_PHOTO: [(PHOTO_FILTER, town_mall_edit_photo), (TEXT_FILTER, town_mall_edit_photo)],
+            },
+        ),
+    ])
+
+    # Plain callback buttons - a group of their own ahead of the conversations, so hot
+    # read-only routes never go through the conversation state lookups
+    application.add_handler(CallbackQueryHandler(dispatch_callback, pattern=str), group=-1)
+
+    # Start the bot - use a webhook when a public URL is configured, otherwise long polling.
+    # The loop is created in __main__, so PTB must not close it on shutdown
+    webhook_url = CFG.webhook_url
+    if webhook_url:
+        secret = secrets.token_urlsafe(32)
+        logger.info("Bot started (webhook)")
+        application.run_webhook(
+            listen="0.0.0.0",
+            port=CFG.port,
+            url_path=secret,
+            webhook_url=f"{webhook_url.rstrip('/')}/{secret}",
+            secret_token=secret,
+            allowed_updates=ALLOWED_UPDATES,
+            close_loop=False,
+        )
+    else:
+        logger.info("Bot started (polling)")
+        # Long-poll: Telegram holds getUpdates open for up to 30s and answers as soon
+        # as an update arrives, and the next poll is sent without any delay
+        application.run_polling(
+            poll_interval=0,
+            timeout=30,
+            allowed_updates=ALLOWED_UPDATES,
+            close_loop=False,
+        )
 
 
 if __name__ == '__main__':
-    # Fix for Python 3.14+ event loop issue
-    try:
-        asyncio.get_running_loop()
-    except RuntimeError:
-        asyncio.set_event_loop(asyncio.new_event_loop())
+    # Python 3.14+ no longer creates a loop implicitly, and run_polling/run_webhook
+    # still use asyncio.get_event_loop() - provide one up front. Nothing is running
+    # at this point, so there is never an existing loop to reuse.
+    asyncio.set_event_loop(new_event_loop())
 
     main()
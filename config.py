@@ -0,0 +1,26 @@
+"""
+Runtime configuration for the Telegram Rewards Bot
+
+Environment variables (and .env) are read once at import time into CFG.
+"""
+
+import os
+from dataclasses import dataclass
+from typing import Optional
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+@dataclass(frozen=True, slots=True)
+class Config:
+    token: Optional[str]
+    webhook_url: Optional[str]
+    port: int
+
+
+CFG = Config(
+    token=os.getenv('TELEGRAM_BOT_TOKEN'),
+    webhook_url=os.getenv('WEBHOOK_URL'),
+    port=int(os.getenv('PORT', 8443)),
+)
@@ -1,6 +1,7 @@
 import sqlite3
+import threading
 from datetime import datetime
-from typing import List, Optional, Tuple, Dict
+from typing import List, Optional, Tuple, Dict, Set
 
 # Point types
 POINT_TYPES = {
@@ -12,19 +13,122 @@ POINT_TYPES = {
     'any': '🌟'
 }
 
+# (emoji, display name) per point type, e.g. 'food_related' -> ('🍳', 'Food Related')
+POINT_TYPE_LABELS = {
+    ptype: (emoji, ptype.replace('_', ' ').title())
+    for ptype, emoji in POINT_TYPES.items()
+}
+
+# (ptype, emoji, display name) of the real point columns - everything but 'any'
+NON_ANY_POINT_TYPES = tuple(
+    (ptype, emoji, type_name)
+    for ptype, (emoji, type_name) in POINT_TYPE_LABELS.items()
+    if ptype != 'any'
+)
+
+# Long-lived connections, one per (thread, database file), shared by every Database
+# instance - each handler module has its own instance but they all hit the same file
+_thread_connections = threading.local()
+_open_connections: List[sqlite3.Connection] = []
+_open_connections_lock = threading.Lock()
+
+
+class _ThreadConnection:
+    """A thread's long-lived connection, handed out by get_connection().
+
+    Methods keep their get_connection()/close() pairs, but close() only discards
+    an uncommitted transaction so the next call on this thread reuses the
+    connection instead of reopening the file and re-reading the schema.
+    """
+
+    def __init__(self, conn: sqlite3.Connection):
+        self._conn = conn
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def close(self):
+        if self._conn.in_transaction:
+            self._conn.rollback()
+
+
+def rollback_thread_connections():
+    """Discard any transaction left open on this thread's connections.
+
+    A method that raised between its first write and its close() would otherwise
+    keep the write lock, and the next method on this thread would commit its
+    half-finished writes.
+    """
+    for conn in _thread_connections.__dict__.values():
+        if conn._conn.in_transaction:
+            conn._conn.rollback()
+
+
+def close_connections():
+    """Really close every connection opened by get_connection() (call on shutdown)"""
+    with _open_connections_lock:
+        for conn in _open_connections:
+            conn.close()
+        _open_connections.clear()
+    # Threads that are still alive open a fresh connection if they are used again
+    global _thread_connections
+    _thread_connections = threading.local()
+
+
 class Database:
     def __init__(self, db_path: str = "bot.db"):
         self.db_path = db_path
         self.init_db()
 
     def get_connection(self):
-        return sqlite3.connect(self.db_path)
+        conns = _thread_connections.__dict__
+        conn = conns.get(self.db_path)
+        if conn is None:
+            # Wait up to 5s for a competing writer instead of failing with "database is locked".
+            # Each thread (event loop or DB pool worker) gets its own connection;
+            # check_same_thread is off only so close_connections() can close them all.
+            raw = sqlite3.connect(self.db_path, timeout=5, check_same_thread=False)
+            # Safe with WAL: only the last transactions can be lost on power failure, never corrupted
+            raw.execute('PRAGMA synchronous = NORMAL')
+            # The connection lives as long as its thread, so a bigger page cache (64 MiB)
+            # and memory-mapped reads (up to 256 MiB) stay warm across calls
+            raw.execute('PRAGMA cache_size = -65536')
+            raw.execute('PRAGMA mmap_size = 268435456')
+            raw.execute('PRAGMA temp_store = MEMORY')
+            with _open_connections_lock:
+                _open_connections.append(raw)
+            conn = conns[self.db_path] = _ThreadConnection(raw)
+        elif conn.in_transaction:
+            # Left over from a call that raised before close() - never build on it
+            conn.rollback()
+        return conn
+
+    def query_one(self, sql: str, params: Tuple = ()) -> Optional[Tuple]:
+        """Run a single-row SELECT on this thread's connection"""
+        conn = self.get_connection()
+        try:
+            return conn.execute(sql, params).fetchone()
+        finally:
+            conn.close()
+
+    def execute(self, sql: str, params: Tuple = ()) -> int:
+        """Run and commit a single write statement, returning the affected row count"""
+        conn = self.get_connection()
+        try:
+            rowcount = conn.execute(sql, params).rowcount
+            conn.commit()
+            return rowcount
+        finally:
+            conn.close()
 
     def init_db(self):
         """Initialize database with all required tables"""
         conn = self.get_connection()
         cursor = conn.cursor()
 
+        # WAL lets readers proceed while a write is in progress; the mode is stored in the file
+        cursor.execute('PRAGMA journal_mode = WAL')
+
         # Groups table
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS groups (
@@ -250,6 +354,16 @@ class Database:
         conn.close()
         return user
 
+    def get_users(self, telegram_ids: List[int]) -> Dict[int, Tuple]:
+        """Get several users in one query, keyed by telegram ID (missing users are left out)"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        placeholders = ','.join('?' * len(telegram_ids))
+        cursor.execute(f'SELECT * FROM users WHERE telegram_id IN ({placeholders})', tuple(telegram_ids))
+        users = {row[0]: row for row in cursor.fetchall()}
+        conn.close()
+        return users
+
     def get_user_points(self, telegram_id: int) -> Dict[str, int]:
         """Get user's points by type"""
         conn = self.get_connection()
@@ -260,7 +374,11 @@ class Database:
         ''', (telegram_id,))
         result = cursor.fetchone()
         conn.close()
+        return self._points_from_row(result)
 
+    @staticmethod
+    def _points_from_row(result) -> Dict[str, int]:
+        """Map a (physical, arts, food_related, educational, other) row to a points dict"""
         if result:
             return {
                 'physical': result[0],
@@ -273,8 +391,15 @@ class Database:
 
     def get_user_total_points(self, telegram_id: int) -> int:
         """Get total points across all types"""
-        points = self.get_user_points(telegram_id)
-        return sum(points.values())
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT points_physical + points_arts + points_food_related + points_educational + points_other
+            FROM users WHERE telegram_id = ?
+        ''', (telegram_id,))
+        result = cursor.fetchone()
+        conn.close()
+        return result[0] if result else 0
 
     def join_group(self, telegram_id: int, group_id: int) -> bool:
         """Add user to a group"""
@@ -315,6 +440,15 @@ class Database:
         conn.close()
         return habits
 
+    def get_habit_name(self, habit_id: int) -> Optional[str]:
+        """Get a habit's name by ID"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute('SELECT name FROM habits WHERE id = ?', (habit_id,))
+        result = cursor.fetchone()
+        conn.close()
+        return result[0] if result else None
+
     def update_habit(self, habit_id: int, name: str, habit_type: str, description: str = "") -> bool:
         """Update a habit"""
         conn = self.get_connection()
@@ -468,18 +602,66 @@ class Database:
         conn.close()
         return completions
 
-    def get_completions_for_date(self, user_id: int, date: str) -> List[int]:
-        """Get list of habit IDs completed on a specific date"""
+    def get_completion_counts_per_day(self, user_id: int, year: int, month: int) -> Dict[int, int]:
+        """Get {day_of_month: number of habits completed} for a user's month"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT CAST(substr(completion_date, 9, 2) AS INTEGER) AS day, COUNT(*)
+            FROM habit_completions
+            WHERE user_id = ? AND completion_date LIKE ?
+            GROUP BY day
+        ''', (user_id, f'{year:04d}-{month:02d}-%'))
+        counts = dict(cursor.fetchall())
+        conn.close()
+        return counts
+
+    def get_habit_completed_days(self, user_id: int, habit_id: int, year: int, month: int) -> Set[int]:
+        """Get the days of a month on which a user completed one habit
+
+        A plain date range (unlike LIKE) lets SQLite seek all three columns of the
+        UNIQUE(user_id, habit_id, completion_date) index.
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT CAST(substr(completion_date, 9, 2) AS INTEGER)
+            FROM habit_completions
+            WHERE user_id = ? AND habit_id = ? AND completion_date >= ? AND completion_date < ?
+        ''', (user_id, habit_id, f'{year:04d}-{month:02d}-01',
+              f'{year + month // 12:04d}-{month % 12 + 1:02d}-01'))
+        days = {row[0] for row in cursor.fetchall()}
+        conn.close()
+        return days
+
+    def get_completions_for_date(self, user_id: int, date: str) -> Set[int]:
+        """Get the set of habit IDs completed on a specific date"""
         conn = self.get_connection()
         cursor = conn.cursor()
         cursor.execute('''
             SELECT habit_id FROM habit_completions
             WHERE user_id = ? AND completion_date = ?
         ''', (user_id, date))
-        completions = [row[0] for row in cursor.fetchall()]
+        completions = {row[0] for row in cursor.fetchall()}
         conn.close()
         return completions
 
+    def get_habits_with_status(self, group_id: int, user_id: int, date: str) -> List[Tuple]:
+        """Get a group's habits as (habit_id, name, habit_type, completed) for one user and date"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT h.id, h.name, h.habit_type, hc.id IS NOT NULL
+            FROM habits h
+            LEFT JOIN habit_completions hc
+                ON hc.habit_id = h.id AND hc.user_id = ? AND hc.completion_date = ?
+            WHERE h.group_id = ?
+            ORDER BY h.id
+        ''', (user_id, date, group_id))
+        habits = cursor.fetchall()
+        conn.close()
+        return habits
+
     # Reward methods
     def add_reward(self, owner_id: int, name: str, price: int, point_type: str) -> int:
         """Add a new reward to user's shop"""
@@ -501,6 +683,22 @@ class Database:
         conn.close()
         return rewards
 
+    def get_shop_view(self, owner_id: int, viewer_id: int) -> Tuple[Optional[Tuple], List[Tuple], Dict[str, int]]:
+        """Get (owner user row, owner's active rewards, viewer's points) over one connection"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute('SELECT * FROM users WHERE telegram_id = ?', (owner_id,))
+        owner = cursor.fetchone()
+        cursor.execute('SELECT * FROM rewards WHERE owner_id = ? AND is_active = 1', (owner_id,))
+        rewards = cursor.fetchall()
+        cursor.execute('''
+            SELECT points_physical, points_arts, points_food_related, points_educational, points_other
+            FROM users WHERE telegram_id = ?
+        ''', (viewer_id,))
+        viewer_points = self._points_from_row(cursor.fetchone())
+        conn.close()
+        return owner, rewards, viewer_points
+
     def get_all_group_rewards(self, group_id: int) -> List[Tuple]:
         """Get all rewards from all users in a group, sorted by price"""
         conn = self.get_connection()
@@ -575,10 +773,24 @@ class Database:
         conn.close()
         return True
 
+    def delete_reward_and_list(self, owner_id: int, reward_id: int) -> List[Tuple]:
+        """Delete a reward and return the owner's remaining rewards in one transaction"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute('UPDATE rewards SET is_active = 0 WHERE id = ?', (reward_id,))
+        cursor.execute('SELECT * FROM rewards WHERE owner_id = ? AND is_active = 1', (owner_id,))
+        rewards = cursor.fetchall()
+        conn.commit()
+        conn.close()
+        return rewards
+
     def buy_reward(self, buyer_id: int, seller_id: int, reward_id: int) -> bool:
         """Process a reward purchase"""
         conn = self.get_connection()
         cursor = conn.cursor()
+        # Take the write lock before the balance checks so concurrent purchases
+        # can't both pass them; every early return's close() rolls back
+        cursor.execute('BEGIN IMMEDIATE')
 
         # Get reward price and point type
         cursor.execute('SELECT price, owner_id, point_type FROM rewards WHERE id = ? AND is_active = 1', (reward_id,))
@@ -682,60 +894,75 @@ class Database:
         return True
 
     def buy_reward_custom(self, buyer_id: int, seller_id: int, reward_id: int, allocation: Dict[str, int]) -> bool:
-        """Process a reward purchase with custom point allocation (for 'any' type rewards)"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
+        """Process a reward purchase with custom point allocation (for 'any' type rewards)
 
-        # Get reward info
-        cursor.execute('SELECT price, owner_id FROM rewards WHERE id = ? AND is_active = 1', (reward_id,))
-        result = cursor.fetchone()
-        if not result:
-            conn.close()
+        Validation and payment run in one IMMEDIATE transaction, so the balances
+        checked are the ones charged even if the buyer's points changed since the
+        allocation was picked.
+        """
+        # Only real point columns with positive amounts - the type names go into SQL
+        if not allocation or any(
+            ptype == 'any' or ptype not in POINT_TYPES or amount <= 0
+            for ptype, amount in allocation.items()
+        ):
             return False
 
-        price, owner_id = result
+        conn = self.get_connection()
+        cursor = conn.cursor()
 
-        # Verify the allocation totals to the price
-        if sum(allocation.values()) != price:
-            conn.close()
-            return False
+        try:
+            cursor.execute('BEGIN IMMEDIATE')
 
-        # Verify buyer has enough of each point type
-        user_points = self.get_user_points(buyer_id)
-        for ptype, amount in allocation.items():
-            if user_points.get(ptype, 0) < amount:
+            # Get reward info
+            cursor.execute('SELECT price, owner_id FROM rewards WHERE id = ? AND is_active = 1', (reward_id,))
+            result = cursor.fetchone()
+
+            # Verify the allocation totals to the price
+            if not result or sum(allocation.values()) != result[0]:
+                conn.rollback()
                 conn.close()
                 return False
 
-        # Process the transaction
-        for ptype, amount in allocation.items():
-            # Deduct from buyer
-            cursor.execute(f'UPDATE users SET points_{ptype} = points_{ptype} - ? WHERE telegram_id = ?',
-                          (amount, buyer_id))
+            price, owner_id = result
 
-        # Give COINS to seller (not points!)
-        cursor.execute('UPDATE users SET coins = coins + ? WHERE telegram_id = ?',
-                      (price, seller_id))
+            # Deduct from buyer - each update only applies if that balance still covers it
+            for ptype, amount in allocation.items():
+                cursor.execute(f'''
+                    UPDATE users SET points_{ptype} = points_{ptype} - ?
+                    WHERE telegram_id = ? AND points_{ptype} >= ?
+                ''', (amount, buyer_id, amount))
+                if cursor.rowcount != 1:
+                    conn.rollback()
+                    conn.close()
+                    return False
 
-        # Track monthly coins for seller
-        from datetime import datetime
-        current_month = datetime.now().strftime('%Y-%m')
-        cursor.execute('''
-            INSERT INTO monthly_stats (user_id, month, coins_earned)
-            VALUES (?, ?, ?)
-            ON CONFLICT(user_id, month) DO UPDATE SET
-            coins_earned = coins_earned + ?
-        ''', (seller_id, current_month, price, price))
+            # Give COINS to seller (not points!)
+            cursor.execute('UPDATE users SET coins = coins + ? WHERE telegram_id = ?',
+                          (price, seller_id))
 
-        # Record transaction
-        cursor.execute('''
-            INSERT INTO transactions (buyer_id, seller_id, reward_id, points, point_type)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (buyer_id, seller_id, reward_id, price, 'any'))
+            # Track monthly coins for seller
+            current_month = datetime.now().strftime('%Y-%m')
+            cursor.execute('''
+                INSERT INTO monthly_stats (user_id, month, coins_earned)
+                VALUES (?, ?, ?)
+                ON CONFLICT(user_id, month) DO UPDATE SET
+                coins_earned = coins_earned + ?
+            ''', (seller_id, current_month, price, price))
 
-        conn.commit()
-        conn.close()
-        return True
+            # Record transaction
+            cursor.execute('''
+                INSERT INTO transactions (buyer_id, seller_id, reward_id, points, point_type)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (buyer_id, seller_id, reward_id, price, 'any'))
+
+            conn.commit()
+            conn.close()
+            return True
+
+        except Exception:
+            conn.rollback()
+            conn.close()
+            raise
 
     def get_user_transactions(self, user_id: int) -> List[Tuple]:
         """Get all transactions for a user"""
@@ -767,6 +994,9 @@ class Database:
         from_column = f'points_{from_type}'
         to_column = f'points_{to_type}'
 
+        # Check and convert in one write transaction (close() rolls it back on refusal)
+        cursor.execute('BEGIN IMMEDIATE')
+
         # Check if user has enough points
         cursor.execute(f'SELECT {from_column} FROM users WHERE telegram_id = ?', (user_id,))
         current_points = cursor.fetchone()[0]
@@ -823,6 +1053,15 @@ class Database:
         conn.close()
         return result[0] if result and result[0] else None
 
+    def get_group_chat_ids(self) -> Dict[int, Optional[int]]:
+        """Get the linked group chat ID (or None) for every reward group"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute('SELECT id, group_chat_id FROM groups')
+        chat_ids = {group_id: chat_id or None for group_id, chat_id in cursor.fetchall()}
+        conn.close()
+        return chat_ids
+
     def set_setgroupchat_confirmation(self, user_id: int, group_id: int, new_chat_id: int):
         """Store a pending setgroupchat confirmation"""
         conn = self.get_connection()
@@ -1109,6 +1348,23 @@ class Database:
         conn.close()
         return count
 
+    def get_medal_counts(self, user_ids: List[int]) -> Dict[int, int]:
+        """Get medal counts for several users in one query (0 for users without medals)"""
+        counts = dict.fromkeys(user_ids, 0)
+        if not counts:
+            return counts
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        placeholders = ','.join('?' * len(counts))
+        cursor.execute(f'''
+            SELECT user_id, COUNT(*) FROM medals
+            WHERE user_id IN ({placeholders})
+            GROUP BY user_id
+        ''', tuple(counts))
+        counts.update(cursor.fetchall())
+        conn.close()
+        return counts
+
     def has_medal_for_habit(self, user_id: int, habit_id: int) -> bool:
         """Check if user has a medal for a specific habit"""
         conn = self.get_connection()
@@ -1241,6 +1497,10 @@ class Database:
         cursor = conn.cursor()
 
         try:
+            # Stock and coins are checked and updated in one write transaction, so two
+            # buyers can't both take the last item or spend the same coins
+            cursor.execute('BEGIN IMMEDIATE')
+
             # Get item details
             cursor.execute('''
                 SELECT name, price_coins, stock, available
@@ -74,10 +74,6 @@ from .points import (
     convert_points_select_amount,
     convert_points_finish
 )
-from .reports import (
-    monthly_report,
-    monthlyreport
-)
 from .townmall import (
     town_mall,
     view_town_mall_item,
@@ -93,6 +89,8 @@ from .townmall import (
     town_mall_dummy_callback
 )
 
+# reports is not imported here: bot.py loads it on first use through _lazy()
+
 __all__ = [
     # Common
     'back_to_menu',
@@ -155,9 +153,6 @@ __all__ = [
     'convert_points_select_to',
     'convert_points_select_amount',
     'convert_points_finish',
-    # Reports
-    'monthly_report',
-    'monthlyreport',
     # Town Mall
     'town_mall',
     'view_town_mall_item',
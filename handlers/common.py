@@ -6,9 +6,10 @@ from telegram import Update
 from telegram.ext import ContextTypes, ConversationHandler
 from utils.keyboards import get_main_menu_keyboard
 from utils.formatters import format_points_display
-from database import Database
+from utils.cache import edit_if_changed, get_user_cached, get_user_points_cached
 
-db = Database()
+# Bound str.format of the menu text - one call instead of building it up piecewise
+_MENU_TEXT = "Main Menu\n\nYour Points ({} total):\n{}".format
 
 
 async def back_to_menu(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -17,23 +18,20 @@ async def back_to_menu(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await query.answer()
 
     user_id = update.effective_user.id
-    user_data = db.get_user(user_id)
+    # Both usually served from the short-lived per-user copies; point changes invalidate them
+    user_data = await get_user_cached(user_id)
 
     if not user_data or not user_data[3]:
         await query.edit_message_text("Please use /start to set up your account first.")
         return ConversationHandler.END
 
-    user_points = db.get_user_points(user_id)
+    user_points = await get_user_points_cached(user_id)
     total_points = sum(user_points.values())
 
-    text = f"Main Menu\n\n"
-    text += f"Your Points ({total_points} total):\n"
-    text += format_points_display(user_points)
+    text = _MENU_TEXT(total_points, format_points_display(user_points))
 
-    await query.edit_message_text(
-        text,
-        reply_markup=get_main_menu_keyboard()
-    )
+    # Navigating back to an unchanged menu is common - skip the no-op edit
+    await edit_if_changed(query, text, get_main_menu_keyboard())
     return ConversationHandler.END
 
 
@@ -13,10 +13,16 @@ from database import Database, POINT_TYPES
 from constants import CREATING_GROUP, JOINING_GROUP
 from utils.keyboards import get_main_menu_keyboard
 from utils.formatters import format_points_display, format_user_name_with_medals
+from utils.announcements import remember_group_chat
+from utils.db_executor import run_db
+from utils.cache import invalidate_views, invalidate_user
+from utils.callbacks import callback_id
 
 # Initialize database
 db = Database()
 
+_MONTH_ABBR = ('', 'Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec')
+
 
 async def create_group_start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Start group creation"""
@@ -31,8 +37,10 @@ async def create_group_finish(update: Update, context: ContextTypes.DEFAULT_TYPE
     group_name = update.message.text
     user_id = update.effective_user.id
 
-    group_id = db.create_group(group_name)
-    db.join_group(user_id, group_id)
+    group_id = await run_db(db.create_group, group_name)
+    await run_db(db.join_group, user_id, group_id)
+    invalidate_views(user_id)
+    invalidate_user(user_id)
 
     await update.message.reply_text(
         f"Group '{group_name}' created successfully!\n"
@@ -57,12 +65,14 @@ async def join_group_finish(update: Update, context: ContextTypes.DEFAULT_TYPE):
         group_id = int(update.message.text)
         user_id = update.effective_user.id
 
-        group = db.get_group(group_id)
+        group = await run_db(db.get_group, group_id)
         if not group:
             await update.message.reply_text("Group not found. Please check the ID and try again.")
             return JOINING_GROUP
 
-        db.join_group(user_id, group_id)
+        await run_db(db.join_group, user_id, group_id)
+        invalidate_views(user_id)
+        invalidate_user(user_id)
         await update.message.reply_text(
             f"Successfully joined group '{group[1]}'!",
             reply_markup=get_main_menu_keyboard()
@@ -79,25 +89,24 @@ async def group_info(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await query.answer()
 
     user_id = update.effective_user.id
-    user_data = db.get_user(user_id)
+    user_data = await run_db(db.get_user, user_id)
 
     if not user_data or not user_data[3]:
         await query.edit_message_text("You need to join a group first!")
         return
 
     group_id = user_data[3]
-    group = db.get_group(group_id)
-    members = db.get_group_members(group_id)
+    group = await run_db(db.get_group, group_id)
+    members = await run_db(db.get_group_members, group_id)
+    medal_counts = await run_db(db.get_medal_counts, [member[0] for member in members])
 
-    text = f"Group: {group[1]}\n"
-    text += f"Group ID: {group_id}\n\n"
-    text += "Members:\n"
+    parts = [f"Group: {group[1]}\nGroup ID: {group_id}\n\nMembers:\n"]
 
     for member in members:
         member_id = member[0]
         name = member[2] or member[1] or f"User {member_id}"
         # Add medal emojis to name
-        name_with_medals = format_user_name_with_medals(member_id, name)
+        name_with_medals = format_user_name_with_medals(name, medal_counts[member_id])
         # Get typed points (columns 5-9: physical, arts, food_related, educational, other)
         points_physical = member[5] if len(member) > 5 else 0
         points_arts = member[6] if len(member) > 6 else 0
@@ -108,12 +117,13 @@ async def group_info(update: Update, context: ContextTypes.DEFAULT_TYPE):
         # Get coins (column 10)
         coins = member[10] if len(member) > 10 else 0
 
-        text += f"\n👤 {name_with_medals}:\n"
-        text += f"   Total: {total_points} pts | {coins} coins\n"
+        parts.append(f"\n👤 {name_with_medals}:\n   Total: {total_points} pts | {coins} coins\n")
         if total_points > 0:  # Show breakdown only if user has points
-            text += f"   💪 Physical: {points_physical} | 🎨 Arts: {points_arts}\n"
-            text += f"   🍽 Food: {points_food} | 📚 Educational: {points_edu}\n"
-            text += f"   ⭐ Other: {points_other}\n"
+            parts.append(
+                f"   💪 Physical: {points_physical} | 🎨 Arts: {points_arts}\n"
+                f"   🍽 Food: {points_food} | 📚 Educational: {points_edu}\n"
+                f"   ⭐ Other: {points_other}\n"
+            )
 
     # Add buttons to view each member's stats
     keyboard = []
@@ -141,7 +151,7 @@ async def group_info(update: Update, context: ContextTypes.DEFAULT_TYPE):
     keyboard.append([InlineKeyboardButton("📊 Monthly Report", callback_data="monthly_report")])
     keyboard.append([InlineKeyboardButton("Back to Menu", callback_data="back_to_menu")])
 
-    await query.edit_message_text(text, reply_markup=InlineKeyboardMarkup(keyboard))
+    await query.edit_message_text("".join(parts), reply_markup=InlineKeyboardMarkup(keyboard))
 
 
 async def todays_stats(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -150,15 +160,15 @@ async def todays_stats(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await query.answer()
 
     user_id = update.effective_user.id
-    user_data = db.get_user(user_id)
+    user_data = await run_db(db.get_user, user_id)
 
     if not user_data or not user_data[3]:
         await query.edit_message_text("You need to join a group first!")
         return
 
     group_id = user_data[3]
-    group = db.get_group(group_id)
-    completions = db.get_todays_group_completions(group_id)
+    group = await run_db(db.get_group, group_id)
+    completions = await run_db(db.get_todays_group_completions, group_id)
 
     today_str = datetime.now().strftime('%B %d, %Y')
     text = f"📅 Today's Stats - {today_str}\n"
@@ -171,6 +181,7 @@ async def todays_stats(update: Update, context: ContextTypes.DEFAULT_TYPE):
     else:
         total_completions = 0
         habit_counts = {}  # Track how many times each habit was completed
+        medal_counts = await run_db(db.get_medal_counts, [user_data['telegram_id'] for user_data in completions])
 
         for user_data in completions:
             name = user_data['first_name'] or user_data['username'] or f"User {user_data['telegram_id']}"
@@ -178,7 +189,7 @@ async def todays_stats(update: Update, context: ContextTypes.DEFAULT_TYPE):
             total_completions += len(habits)
 
             # Add medal decoration to name
-            name_with_medals = format_user_name_with_medals(user_data['telegram_id'], name)
+            name_with_medals = format_user_name_with_medals(name, medal_counts[user_data['telegram_id']])
 
             text += f"👤 {name_with_medals}\n"
 
@@ -239,7 +250,7 @@ async def setgroupchat(update: Update, context: ContextTypes.DEFAULT_TYPE):
     current_chat_name = update.effective_chat.title or "this group"
 
     # Get user's reward group
-    user_data = db.get_user(user_id)
+    user_data = await run_db(db.get_user, user_id)
     if not user_data or not user_data[3]:
         await update.message.reply_text(
             "You need to join a reward group first!\n\n"
@@ -248,13 +259,13 @@ async def setgroupchat(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return
 
     group_id = user_data[3]
-    group_data = db.get_group(group_id)
+    group_data = await run_db(db.get_group, group_id)
 
     # Check if there's already a linked chat
-    existing_chat_id = db.get_group_chat_id(group_id)
+    existing_chat_id = await run_db(db.get_group_chat_id, group_id)
 
     # Check if there's a pending confirmation
-    pending_confirmation = db.get_setgroupchat_confirmation(user_id, group_id)
+    pending_confirmation = await run_db(db.get_setgroupchat_confirmation, user_id, group_id)
 
     if existing_chat_id and existing_chat_id != chat_id and not pending_confirmation:
         # There's a different chat already linked - show warning
@@ -266,14 +277,15 @@ async def setgroupchat(update: Update, context: ContextTypes.DEFAULT_TYPE):
             f"(This is a safety check to prevent accidental relinking)"
         )
         # Store confirmation state in database
-        db.set_setgroupchat_confirmation(user_id, group_id, chat_id)
+        await run_db(db.set_setgroupchat_confirmation, user_id, group_id, chat_id)
         return
 
     # Check if user is confirming a relink
     if pending_confirmation and pending_confirmation == chat_id:
         # User confirmed, proceed with relinking
-        db.set_group_chat(group_id, chat_id)
-        db.clear_setgroupchat_confirmation(user_id, group_id)
+        await run_db(db.set_group_chat, group_id, chat_id)
+        await run_db(db.clear_setgroupchat_confirmation, user_id, group_id)
+        remember_group_chat(context, group_id, chat_id)
 
         await update.message.reply_text(
             f"✅ Success! Chat relinked.\n\n"
@@ -286,7 +298,8 @@ async def setgroupchat(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return
 
     # No existing link or same chat - proceed normally
-    db.set_group_chat(group_id, chat_id)
+    await run_db(db.set_group_chat, group_id, chat_id)
+    remember_group_chat(context, group_id, chat_id)
 
     await update.message.reply_text(
         f"✅ Success!\n\n"
@@ -304,17 +317,18 @@ async def view_user_stats(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await query.answer()
 
     # Extract the target user ID from callback data
-    target_user_id = int(query.data.split('_')[-1])
+    target_user_id = callback_id(query.data)
 
     # Get target user data
-    target_user_data = db.get_user(target_user_id)
+    target_user_data = await run_db(db.get_user, target_user_id)
     if not target_user_data:
         await query.edit_message_text("User not found!")
         return
 
     target_name = target_user_data[2] or target_user_data[1] or f"User {target_user_id}"
     # Add medal emojis to name
-    target_name_with_medals = format_user_name_with_medals(target_user_id, target_name)
+    medal_count = await run_db(db.get_medal_count, target_user_id)
+    target_name_with_medals = format_user_name_with_medals(target_name, medal_count)
 
     # Get habit completions for the target user (current month)
     from datetime import datetime
@@ -322,7 +336,7 @@ async def view_user_stats(update: Update, context: ContextTypes.DEFAULT_TYPE):
     year = now.year
     month = now.month
 
-    completions = db.get_user_completions_for_month(target_user_id, year, month)
+    completions = await run_db(db.get_user_completions_for_month, target_user_id, year, month)
 
     if not completions:
         text = f"📊 {target_name_with_medals}'s Stats for {now.strftime('%B %Y')}:\n\n"
@@ -340,7 +354,8 @@ async def view_user_stats(update: Update, context: ContextTypes.DEFAULT_TYPE):
             by_date[date].append(habit_name)
 
         for date in sorted(by_date.keys()):
-            day = datetime.strptime(date, '%Y-%m-%d').strftime('%d %b')
+            # 'YYYY-MM-DD' -> 'DD Mon' by slicing; strptime/strftime per row is far slower
+            day = f"{date[8:10]} {_MONTH_ABBR[int(date[5:7])]}"
             habits_on_date = by_date[date]
             text += f"📅 {day}:\n"
             for habit in habits_on_date:
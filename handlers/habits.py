@@ -8,9 +8,11 @@ This module contains all handlers related to habit management, including:
 - Managing habit completions and streaks
 """
 
+import time
+import asyncio
 import logging
 import calendar
-from datetime import datetime
+from datetime import date, datetime, timedelta
 from collections import defaultdict
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes, ConversationHandler
@@ -23,11 +25,109 @@ from constants import (
     EDITING_HABIT_TYPE,
 )
 from utils.keyboards import get_main_menu_keyboard, get_habit_type_keyboard
+from utils.formatters import point_type_label
 from utils.announcements import send_group_announcement
+from utils.db_executor import run_db
+from utils.cache import (
+    cached_render, invalidate_views, invalidate_all_views, get_user_cached, invalidate_user,
+    edit_if_changed, get_habit_name_cached, invalidate_habit_name,
+)
+from utils.callbacks import callback_arg, callback_id
 
 logger = logging.getLogger(__name__)
 db = Database()
 
+# (epoch minute, today, yesterday) with the dates as 'YYYY-MM-DD' - the date can
+# only change on a minute boundary
+_today_cache = (None, '', '')
+
+
+def _refresh_today_cache():
+    global _today_cache
+    minute = int(time.time()) // 60
+    if _today_cache[0] != minute:
+        today = date.today()
+        _today_cache = (minute, today.isoformat(), (today - timedelta(days=1)).isoformat())
+    return _today_cache
+
+
+def _today_iso():
+    """Today's date as 'YYYY-MM-DD', recomputed at most once a minute"""
+    return _refresh_today_cache()[1]
+
+
+def _yesterday_iso():
+    """Yesterday's date as 'YYYY-MM-DD', recomputed at most once a minute"""
+    return _refresh_today_cache()[2]
+
+
+# Preformatted calendar cells ("🟢 7 ") indexed by day of month, built once
+_DAY_GREEN = [''] + [f"🟢{day:>2} " for day in range(1, 32)]
+_DAY_YELLOW = [''] + [f"🟡{day:>2} " for day in range(1, 32)]
+_DAY_WHITE = [''] + [f"⬜{day:>2} " for day in range(1, 32)]
+_DAY_BLACK = [''] + [f"⬛{day:>2} " for day in range(1, 32)]
+_EMPTY_CELL = "    "  # 4 spaces per empty cell before the 1st
+_WEEKDAY_HEADER = "Mo  Tu  We  Th  Fr  Sa  Su\n"
+_LEGEND_OVERALL = "🟢 All done | 🟡 Partial | ⬜ None | ⬛ Future\n\n"
+_LEGEND_HABIT = "🟢 Done | ⬜ Not done | ⬛ Future\n\n"
+
+_MONTH_ABBR = ('', 'Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec')
+
+# Static, so built once and shared (InlineKeyboardMarkup is immutable)
+_MANAGE_HABITS_MARKUP = InlineKeyboardMarkup([
+    [InlineKeyboardButton("Add Habit", callback_data="add_habit")],
+    [InlineKeyboardButton("Edit Habit", callback_data="edit_habit_list")],
+    [InlineKeyboardButton("Delete Habit", callback_data="delete_habit_list")],
+    [InlineKeyboardButton("Back", callback_data="my_habits")],
+])
+
+# "<marker><type emoji> <name>" - the label of every habit button
+_HABIT_LABEL = "{}{} {}".format
+
+
+def _status_habit_rows(habits, prefix: str):
+    """Text lines and toggle buttons for get_habits_with_status rows"""
+    lines = []
+    keyboard = []
+    for habit_id, habit_name, habit_type, is_completed in habits:
+        label = _HABIT_LABEL("✅ " if is_completed else "⬜ ", POINT_TYPES.get(habit_type, '⭐'), habit_name)
+        lines.append(label)
+        keyboard.append([InlineKeyboardButton(label, callback_data=f"{prefix}{habit_id}")])
+    return lines, keyboard
+
+
+def _habit_list_keyboard(habits, prefix: str, marker: str = ""):
+    """One button per get_group_habits row, calling back with prefix + habit id"""
+    keyboard = []
+    for habit in habits:
+        habit_type = habit[5] if len(habit) > 5 else 'other'
+        keyboard.append([InlineKeyboardButton(
+            _HABIT_LABEL(marker, POINT_TYPES.get(habit_type, '⭐'), habit[2]),
+            callback_data=f"{prefix}{habit[0]}"
+        )])
+    return keyboard
+
+
+# (year, month) -> (num_days, first_weekday, 'Month YYYY', leading empty cells)
+_MONTH_LAYOUTS = {}
+
+
+def _month_layout(year: int, month: int):
+    """Calendar layout of a month, which is the same for every user - computed once per month"""
+    layout = _MONTH_LAYOUTS.get((year, month))
+    if layout is None:
+        first_weekday, num_days = calendar.monthrange(year, month)  # 0 = Monday, 6 = Sunday
+        title = date(year, month, 1).strftime('%B %Y')
+        layout = _MONTH_LAYOUTS[(year, month)] = (num_days, first_weekday, title, _EMPTY_CELL * first_weekday)
+    return layout
+
+
+async def _invalidate_group(group_id: int):
+    """Drop cached rows and views of every member after a group-wide coin award"""
+    members = await run_db(db.get_group_members, group_id)
+    invalidate_user(*(member[0] for member in members))
+    invalidate_all_views()
+
 
 async def my_habits(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Show user's habits for today"""
@@ -35,14 +135,15 @@ async def my_habits(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await query.answer()
 
     user_id = update.effective_user.id
-    user_data = db.get_user(user_id)
+    user_data = await get_user_cached(user_id)
 
     if not user_data or not user_data[3]:
         await query.edit_message_text("You need to join a group first!")
         return
 
     group_id = user_data[3]
-    habits = db.get_group_habits(group_id)
+    today = _today_iso()
+    habits = await run_db(db.get_habits_with_status, group_id, user_id, today)
 
     if not habits:
         keyboard = [[InlineKeyboardButton("Add Habit", callback_data="add_habit")],
@@ -53,32 +154,14 @@ async def my_habits(update: Update, context: ContextTypes.DEFAULT_TYPE):
         )
         return
 
-    # Get today's completions
-    today = datetime.now().strftime('%Y-%m-%d')
-    completed_habit_ids = db.get_completions_for_date(user_id, today)
-
-    # Create keyboard with habits
-    keyboard = []
-    text = "Today's Habits:\n\n"
-
-    for habit in habits:
-        habit_id = habit[0]
-        habit_name = habit[2]
-        habit_type = habit[5] if len(habit) > 5 else 'other'  # habit_type is column 5
-        is_completed = habit_id in completed_habit_ids
-
-        type_emoji = POINT_TYPES.get(habit_type, '⭐')
-        status = "✅" if is_completed else "⬜"
-        text += f"{status} {type_emoji} {habit_name}\n"
-
-        callback_data = f"toggle_habit_{habit_id}"
-        keyboard.append([InlineKeyboardButton(f"{status} {type_emoji} {habit_name}", callback_data=callback_data)])
+    lines, keyboard = _status_habit_rows(habits, "toggle_habit_")
+    text = "Today's Habits:\n\n" + "".join(line + "\n" for line in lines)
 
     keyboard.append([InlineKeyboardButton("📅 Yesterday's Habits", callback_data="yesterday_habits")])
     keyboard.append([InlineKeyboardButton("Manage Habits", callback_data="manage_habits")])
     keyboard.append([InlineKeyboardButton("Back to Menu", callback_data="back_to_menu")])
 
-    await query.edit_message_text(text, reply_markup=InlineKeyboardMarkup(keyboard))
+    await edit_if_changed(query, text, InlineKeyboardMarkup(keyboard))
 
 
 async def yesterday_habits(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -87,14 +170,17 @@ async def yesterday_habits(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await query.answer()
 
     user_id = update.effective_user.id
-    user_data = db.get_user(user_id)
+    user_data = await get_user_cached(user_id)
 
     if not user_data or not user_data[3]:
         await query.edit_message_text("You need to join a group first!")
         return
 
     group_id = user_data[3]
-    habits = db.get_group_habits(group_id)
+
+    yesterday = _yesterday_iso()
+    yesterday_display = date.fromisoformat(yesterday).strftime('%B %d, %Y')
+    habits = await run_db(db.get_habits_with_status, group_id, user_id, yesterday)
 
     if not habits:
         keyboard = [[InlineKeyboardButton("Back to Today", callback_data="my_habits")],
@@ -105,28 +191,8 @@ async def yesterday_habits(update: Update, context: ContextTypes.DEFAULT_TYPE):
         )
         return
 
-    # Get yesterday's date
-    from datetime import timedelta
-    yesterday = (datetime.now() - timedelta(days=1)).strftime('%Y-%m-%d')
-    yesterday_display = (datetime.now() - timedelta(days=1)).strftime('%B %d, %Y')
-    completed_habit_ids = db.get_completions_for_date(user_id, yesterday)
-
-    # Create keyboard with habits
-    keyboard = []
-    text = f"Yesterday's Habits ({yesterday_display}):\n\n"
-
-    for habit in habits:
-        habit_id = habit[0]
-        habit_name = habit[2]
-        habit_type = habit[5] if len(habit) > 5 else 'other'
-        is_completed = habit_id in completed_habit_ids
-
-        type_emoji = POINT_TYPES.get(habit_type, '⭐')
-        status = "✅" if is_completed else "⬜"
-        text += f"{status} {type_emoji} {habit_name}\n"
-
-        callback_data = f"toggle_yesterday_{habit_id}"
-        keyboard.append([InlineKeyboardButton(f"{status} {type_emoji} {habit_name}", callback_data=callback_data)])
+    lines, keyboard = _status_habit_rows(habits, "toggle_yesterday_")
+    text = f"Yesterday's Habits ({yesterday_display}):\n\n" + "".join(line + "\n" for line in lines)
 
     keyboard.append([InlineKeyboardButton("« Back to Today", callback_data="my_habits")])
     keyboard.append([InlineKeyboardButton("Back to Menu", callback_data="back_to_menu")])
@@ -139,47 +205,38 @@ async def toggle_yesterday_habit(update: Update, context: ContextTypes.DEFAULT_T
     query = update.callback_query
     await query.answer()
 
-    habit_id = int(query.data.split('_')[2])
+    habit_id = callback_id(query.data)
     user_id = update.effective_user.id
 
-    # Get yesterday's date
-    from datetime import timedelta
-    yesterday = (datetime.now() - timedelta(days=1)).strftime('%Y-%m-%d')
-    yesterday_month = (datetime.now() - timedelta(days=1)).strftime('%Y-%m')
-
-    completed_habit_ids = db.get_completions_for_date(user_id, yesterday)
+    yesterday = _yesterday_iso()
+    yesterday_month = yesterday[:7]
 
-    if habit_id in completed_habit_ids:
-        # Unmark completion
-        db.unmark_habit_complete(user_id, habit_id, yesterday)
-    else:
+    # Unmarking succeeds only if the habit was completed, so it doubles as the
+    # completion check - no separate lookup of yesterday's completions
+    if not await run_db(db.unmark_habit_complete, user_id, habit_id, yesterday):
         # Mark completion for yesterday
-        db.mark_habit_complete(user_id, habit_id, yesterday)
+        await run_db(db.mark_habit_complete, user_id, habit_id, yesterday)
 
         # Update streak with yesterday's date
-        streak_info = db.update_streak(user_id, habit_id, yesterday)
+        streak_info = await run_db(db.update_streak, user_id, habit_id, yesterday)
 
         # Get user and group info for announcements
-        user_data = db.get_user(user_id)
+        user_data = await get_user_cached(user_id)
         group_id = user_data[3]
         user_name = update.effective_user.first_name or update.effective_user.username or "Someone"
 
         # Get habit info
-        conn = db.get_connection()
-        cursor = conn.cursor()
-        cursor.execute('SELECT name FROM habits WHERE id = ?', (habit_id,))
-        habit_name = cursor.fetchone()[0]
-        conn.close()
+        habit_name = await get_habit_name_cached(habit_id)
 
         # Check for 30-day streak medal
         if streak_info['current_streak'] == 30:
-            if not db.has_medal_for_habit(user_id, habit_id):
-                db.award_medal(user_id, habit_id)
+            if not await run_db(db.has_medal_for_habit, user_id, habit_id):
+                await run_db(db.award_medal, user_id, habit_id)
                 medal_message = f"🏅 {user_name} earned a medal for '{habit_name}'! 30-day streak completed! (backdated)"
                 await send_group_announcement(context, group_id, medal_message)
 
         # Check for medal milestones (3rd medal)
-        medal_count = db.get_medal_count(user_id)
+        medal_count = await run_db(db.get_medal_count, user_id)
         if medal_count == 3:
             milestone_message = f"🎖️ {user_name} earned their 3rd medal! Conversion rate bonus unlocked: 1.5:1"
             await send_group_announcement(context, group_id, milestone_message)
@@ -193,23 +250,25 @@ async def toggle_yesterday_habit(update: Update, context: ContextTypes.DEFAULT_T
             await send_group_announcement(context, group_id, message)
 
         # Check if habit is medaled - give coins instead of points
-        if db.has_medal_for_habit(user_id, habit_id):
+        if await run_db(db.has_medal_for_habit, user_id, habit_id):
             # Give 0.5 coins for medaled habit
-            conn = db.get_connection()
-            cursor = conn.cursor()
-            cursor.execute('UPDATE users SET coins = coins + 0.5 WHERE telegram_id = ?', (user_id,))
-            conn.commit()
-            conn.close()
+            await run_db(db.execute, 'UPDATE users SET coins = coins + 0.5 WHERE telegram_id = ?', (user_id,))
 
             completion_message = f"💰 {user_name} completed '{habit_name}' (yesterday) - medaled habit! +0.5 coins"
             await send_group_announcement(context, group_id, completion_message)
 
         # Check for group habit completion
-        group_complete = db.check_and_award_group_habit_completion(group_id, habit_id, yesterday_month)
+        group_complete = await run_db(db.check_and_award_group_habit_completion, group_id, habit_id, yesterday_month)
         if group_complete:
+            await _invalidate_group(group_id)
             group_message = f"🎉 Group Achievement! '{habit_name}' completed every day this month by the group! Everyone gets 10 coins!"
             await send_group_announcement(context, group_id, group_message)
 
+    # Invalidate only after every write above, so a view rendered concurrently
+    # can't put pre-write data back into the caches
+    invalidate_views(user_id)
+    invalidate_user(user_id)
+
     # Refresh the yesterday habits view
     await yesterday_habits(update, context)
 
@@ -219,55 +278,49 @@ async def toggle_habit(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
     await query.answer()
 
-    habit_id = int(query.data.split('_')[2])
+    habit_id = callback_id(query.data)
     user_id = update.effective_user.id
-    today = datetime.now().strftime('%Y-%m-%d')
-    current_month = datetime.now().strftime('%Y-%m')
-
-    completed_habit_ids = db.get_completions_for_date(user_id, today)
+    today = _today_iso()
+    current_month = today[:7]
 
-    if habit_id in completed_habit_ids:
-        db.unmark_habit_complete(user_id, habit_id, today)
-    else:
-        db.mark_habit_complete(user_id, habit_id, today)
+    # Unmarking succeeds only if the habit was completed, so it doubles as the
+    # completion check - no separate lookup of today's completions
+    if not await run_db(db.unmark_habit_complete, user_id, habit_id, today):
+        await run_db(db.mark_habit_complete, user_id, habit_id, today)
 
         # Update streak and check for milestones
-        streak_info = db.update_streak(user_id, habit_id, today)
+        streak_info = await run_db(db.update_streak, user_id, habit_id, today)
 
         # Get user and group info
-        user_data = db.get_user(user_id)
+        user_data = await get_user_cached(user_id)
         group_id = user_data[3]
         user_name = update.effective_user.first_name or update.effective_user.username or "Someone"
 
         # Get habit info
-        conn = db.get_connection()
-        cursor = conn.cursor()
-        cursor.execute('SELECT name FROM habits WHERE id = ?', (habit_id,))
-        habit_name = cursor.fetchone()[0]
-        conn.close()
+        habit_name = await get_habit_name_cached(habit_id)
 
         # Check if user reached 30-day streak and award medal
         if streak_info['current_streak'] == 30:
             # Check if user doesn't have medal for this habit yet
-            if not db.has_medal_for_habit(user_id, habit_id):
+            if not await run_db(db.has_medal_for_habit, user_id, habit_id):
                 # Award medal
-                db.award_medal(user_id, habit_id)
+                await run_db(db.award_medal, user_id, habit_id)
 
                 # Send medal announcement
                 medal_message = f"🏅 {user_name} earned a medal for '{habit_name}'! 30-day streak completed!"
                 await send_group_announcement(context, group_id, medal_message)
 
         # Check if this is the user's 3rd medal total
-        medal_count = db.get_medal_count(user_id)
+        medal_count = await run_db(db.get_medal_count, user_id)
         if medal_count == 3:
             # Send conversion rate improvement announcement
             conversion_message = f"⭐ {user_name} earned 3 medals! Conversion rate improved to 1.5:1!"
             await send_group_announcement(context, group_id, conversion_message)
 
         # Award coins based on medal status for THIS habit
-        if db.has_medal_for_habit(user_id, habit_id):
+        if await run_db(db.has_medal_for_habit, user_id, habit_id):
             # User has medal for this habit, give 0.5 coins
-            db.add_coins(user_id, 0.5)
+            await run_db(db.add_coins, user_id, 0.5)
         else:
             # No medal for this habit, give 1 point (already done by mark_habit_complete)
             pass
@@ -283,11 +336,17 @@ async def toggle_habit(update: Update, context: ContextTypes.DEFAULT_TYPE):
             await send_group_announcement(context, group_id, message)
 
         # Check for group habit completion
-        if db.check_and_award_group_habit_completion(group_id, habit_id, current_month):
+        if await run_db(db.check_and_award_group_habit_completion, group_id, habit_id, current_month):
+            await _invalidate_group(group_id)
             # Send group achievement announcement
             group_message = f"🎉 Group Achievement! '{habit_name}' completed every day this month! Everyone gets 10 coins!"
             await send_group_announcement(context, group_id, group_message)
 
+    # Invalidate only after every write above, so a view rendered concurrently
+    # can't put pre-write data back into the caches
+    invalidate_views(user_id)
+    invalidate_user(user_id)
+
     # Refresh the habits view
     await my_habits(update, context)
 
@@ -297,17 +356,7 @@ async def manage_habits(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
     await query.answer()
 
-    keyboard = [
-        [InlineKeyboardButton("Add Habit", callback_data="add_habit")],
-        [InlineKeyboardButton("Edit Habit", callback_data="edit_habit_list")],
-        [InlineKeyboardButton("Delete Habit", callback_data="delete_habit_list")],
-        [InlineKeyboardButton("Back", callback_data="my_habits")],
-    ]
-
-    await query.edit_message_text(
-        "Habit Management",
-        reply_markup=InlineKeyboardMarkup(keyboard)
-    )
+    await query.edit_message_text("Habit Management", reply_markup=_MANAGE_HABITS_MARKUP)
 
 
 async def add_habit_start(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -322,7 +371,7 @@ async def add_habit_get_name(update: Update, context: ContextTypes.DEFAULT_TYPE)
     """Get habit name and ask for type"""
     habit_name = update.message.text
     user_id = update.effective_user.id
-    user_data = db.get_user(user_id)
+    user_data = await get_user_cached(user_id)
 
     if not user_data or not user_data[3]:
         await update.message.reply_text("You need to join a group first!")
@@ -343,20 +392,20 @@ async def add_habit_finish(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
     await query.answer()
 
-    habit_type = query.data.replace('habittype_', '')  # Extract type from "habittype_food_related"
+    habit_type = callback_arg(query.data)  # Extract type from "habittype_food_related"
     habit_name = context.user_data.get('new_habit_name')
     user_id = update.effective_user.id
-    user_data = db.get_user(user_id)
+    user_data = await get_user_cached(user_id)
 
     if not user_data or not user_data[3]:
         await query.edit_message_text("You need to join a group first!")
         return ConversationHandler.END
 
     group_id = user_data[3]
-    db.add_habit(group_id, habit_name, habit_type)
+    await run_db(db.add_habit, group_id, habit_name, habit_type)
+    invalidate_views(update.effective_user.id)
 
-    type_emoji = POINT_TYPES.get(habit_type, '⭐')
-    type_name = habit_type.replace('_', ' ').title()
+    type_emoji, type_name = point_type_label(habit_type)
 
     await query.edit_message_text(
         f"Habit '{habit_name}' added successfully!\nType: {type_emoji} {type_name}",
@@ -371,22 +420,15 @@ async def edit_habit_list(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await query.answer()
 
     user_id = update.effective_user.id
-    user_data = db.get_user(user_id)
+    user_data = await get_user_cached(user_id)
     group_id = user_data[3]
-    habits = db.get_group_habits(group_id)
+    habits = await run_db(db.get_group_habits, group_id)
 
     if not habits:
         await query.edit_message_text("No habits to edit.")
         return
 
-    keyboard = []
-    for habit in habits:
-        habit_type = habit[5] if len(habit) > 5 else 'other'
-        type_emoji = POINT_TYPES.get(habit_type, '⭐')
-        keyboard.append([InlineKeyboardButton(
-            f"{type_emoji} {habit[2]}",
-            callback_data=f"edit_habit_{habit[0]}"
-        )])
+    keyboard = _habit_list_keyboard(habits, "edit_habit_")
     keyboard.append([InlineKeyboardButton("Back", callback_data="manage_habits")])
 
     await query.edit_message_text(
@@ -400,7 +442,7 @@ async def edit_habit_start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
     await query.answer()
 
-    habit_id = int(query.data.split('_')[2])
+    habit_id = callback_id(query.data)
     context.user_data['editing_habit_id'] = habit_id
 
     await query.edit_message_text("Please enter the new name for this habit:")
@@ -429,12 +471,13 @@ async def edit_habit_finish(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     habit_id = context.user_data.get('editing_habit_id')
     new_name = context.user_data.get('editing_habit_name')
-    habit_type = query.data.replace('habittype_', '')  # Extract type from "habittype_food_related"
+    habit_type = callback_arg(query.data)  # Extract type from "habittype_food_related"
 
-    db.update_habit(habit_id, new_name, habit_type)
+    await run_db(db.update_habit, habit_id, new_name, habit_type)
+    invalidate_views(update.effective_user.id)
+    invalidate_habit_name(habit_id)
 
-    type_emoji = POINT_TYPES.get(habit_type, '⭐')
-    type_name = habit_type.replace('_', ' ').title()
+    type_emoji, type_name = point_type_label(habit_type)
 
     await query.edit_message_text(
         f"Habit '{new_name}' updated!\nType: {type_emoji} {type_name}",
@@ -449,22 +492,15 @@ async def delete_habit_list(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await query.answer()
 
     user_id = update.effective_user.id
-    user_data = db.get_user(user_id)
+    user_data = await get_user_cached(user_id)
     group_id = user_data[3]
-    habits = db.get_group_habits(group_id)
+    habits = await run_db(db.get_group_habits, group_id)
 
     if not habits:
         await query.edit_message_text("No habits to delete.")
         return
 
-    keyboard = []
-    for habit in habits:
-        habit_type = habit[5] if len(habit) > 5 else 'other'
-        type_emoji = POINT_TYPES.get(habit_type, '⭐')
-        keyboard.append([InlineKeyboardButton(
-            f"❌ {type_emoji} {habit[2]}",
-            callback_data=f"confirm_delete_habit_{habit[0]}"
-        )])
+    keyboard = _habit_list_keyboard(habits, "confirm_delete_habit_", marker="❌ ")
     keyboard.append([InlineKeyboardButton("Back", callback_data="manage_habits")])
 
     await query.edit_message_text(
@@ -476,59 +512,64 @@ async def delete_habit_list(update: Update, context: ContextTypes.DEFAULT_TYPE):
 async def delete_habit_confirm(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Delete a habit"""
     query = update.callback_query
-    await query.answer()
 
-    habit_id = int(query.data.split('_')[3])
-    db.delete_habit(habit_id)
+    habit_id = callback_id(query.data)
+    await run_db(db.delete_habit, habit_id)
+    invalidate_views(update.effective_user.id)
+    invalidate_habit_name(habit_id)
 
-    await query.edit_message_text("Habit deleted successfully!")
-    await manage_habits(update, context)
+    # Confirm with a toast and go straight back to the management menu
+    await query.answer("Habit deleted!")
+    await query.edit_message_text("Habit Management", reply_markup=_MANAGE_HABITS_MARKUP)
 
 
+@cached_render
 async def my_stats(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Show user statistics for current month"""
     query = update.callback_query
-    await query.answer()
 
     user_id = update.effective_user.id
-    user_data = db.get_user(user_id)
+    user_data = await get_user_cached(user_id)
 
     if not user_data or not user_data[3]:
         await query.edit_message_text("You need to join a group first!")
         return
 
     group_id = user_data[3]
-    habits = db.get_group_habits(group_id)
-
     now = datetime.now()
     year = now.year
     month = now.month
 
-    completions = db.get_user_completions_for_month(user_id, year, month)
+    # Independent reads - run them side by side on the DB pool
+    habits, completions = await asyncio.gather(
+        run_db(db.get_group_habits, group_id),
+        run_db(db.get_user_completions_for_month, user_id, year, month),
+    )
 
+    month_title = _month_layout(year, month)[2]
+    parts = [f"Your Stats for {month_title}:\n\n"]
     if not completions:
-        text = f"Your Stats for {now.strftime('%B %Y')}:\n\n"
         total_points = sum(user_data[5:10]) if len(user_data) > 9 else 0
-        text += f"No habits completed this month yet.\n\nTotal Points: {total_points}"
+        parts.append(f"No habits completed this month yet.\n\nTotal Points: {total_points}")
     else:
-        text = f"Your Stats for {now.strftime('%B %Y')}:\n\n"
-
         # Group by date
         by_date = defaultdict(list)
         for completion in completions:
-            date = completion[3]  # completion_date (YYYY-MM-DD format)
+            completion_date = completion[3]  # YYYY-MM-DD format
             habit_name = completion[4]  # habit_name from join
-            by_date[date].append(habit_name)
+            by_date[completion_date].append(habit_name)
 
-        for date in sorted(by_date.keys()):
-            day = datetime.strptime(date, '%Y-%m-%d').strftime('%d %b')
-            habits_on_date = by_date[date]
-            text += f"📅 {day}:\n"
+        for completion_date in sorted(by_date.keys()):
+            # 'YYYY-MM-DD' -> 'DD Mon' by slicing; strptime/strftime per row is far slower
+            day = f"{completion_date[8:10]} {_MONTH_ABBR[int(completion_date[5:7])]}"
+            habits_on_date = by_date[completion_date]
+            parts.append(f"📅 {day}:\n")
             for habit in habits_on_date:
-                text += f"  ✅ {habit}\n"
+                parts.append(f"  ✅ {habit}\n")
 
         total_points = sum(user_data[5:10]) if len(user_data) > 9 else 0
-        text += f"\nTotal Points: {total_points}"
+        parts.append(f"\nTotal Points: {total_points}")
+    text = "".join(parts)
 
     keyboard = [
         [InlineKeyboardButton("📆 Overall Calendar", callback_data="calendar_view")]
@@ -542,90 +583,79 @@ async def my_stats(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     keyboard.append([InlineKeyboardButton("Back to Menu", callback_data="back_to_menu")])
 
-    await query.edit_message_text(text, reply_markup=InlineKeyboardMarkup(keyboard))
+    return text, InlineKeyboardMarkup(keyboard)
 
 
+@cached_render
 async def calendar_view(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Show calendar view with colored day numbers for completed habits"""
     query = update.callback_query
-    await query.answer()
 
     user_id = update.effective_user.id
-    user_data = db.get_user(user_id)
+    user_data = await get_user_cached(user_id)
 
     if not user_data or not user_data[3]:
         await query.edit_message_text("You need to join a group first!")
         return
 
     group_id = user_data[3]
-    habits = db.get_group_habits(group_id)
-    total_habits = len(habits)
-
     now = datetime.now()
     year = now.year
     month = now.month
 
-    # Get number of days in month
-    num_days = calendar.monthrange(year, month)[1]
-    first_weekday = calendar.monthrange(year, month)[0]  # 0 = Monday, 6 = Sunday
-
-    # Get all completions for the month
-    completions = db.get_user_completions_for_month(user_id, year, month)
+    num_days, first_weekday, month_title, leading_cells = _month_layout(year, month)
 
-    # Count completions per day
-    completions_per_day = defaultdict(int)
-    for completion in completions:
-        date = completion[3]  # completion_date
-        day = int(date.split('-')[2])
-        completions_per_day[day] += 1
+    # Habit list and completions per day are independent - fetch them side by side
+    habits, completions_per_day = await asyncio.gather(
+        run_db(db.get_group_habits, group_id),
+        run_db(db.get_completion_counts_per_day, user_id, year, month),
+    )
+    total_habits = len(habits)
 
     # Build calendar
-    text = f"📆 Overall Calendar - {now.strftime('%B %Y')}\n\n"
-    text += "🟢 All done | 🟡 Partial | ⬜ None | ⬛ Future\n\n"
-
-    # Weekday headers - using monospace formatting
-    text += "Mo  Tu  We  Th  Fr  Sa  Su\n"
+    parts = [
+        f"📆 Overall Calendar - {month_title}\n\n",
+        _LEGEND_OVERALL,
+        # Weekday headers - using monospace formatting
+        _WEEKDAY_HEADER,
+    ]
 
-    # Add leading spaces for first week
+    # Leading empty cells for the first week, then one cell per day
     today = now.day
-    calendar_line = ""
-    for i in range(first_weekday):
-        calendar_line += "    "  # 4 spaces per empty cell
+    parts.append(leading_cells)
 
     for day in range(1, num_days + 1):
         if day > today:
             # Future days - use black square
-            day_str = f"⬛{day:>2}"
+            parts.append(_DAY_BLACK[day])
         elif day in completions_per_day:
             completed = completions_per_day[day]
             if total_habits == 0:
-                day_str = f"⬜{day:>2}"
+                parts.append(_DAY_WHITE[day])
             elif completed >= total_habits:
-                day_str = f"🟢{day:>2}"
+                parts.append(_DAY_GREEN[day])
             else:
-                day_str = f"🟡{day:>2}"
+                parts.append(_DAY_YELLOW[day])
         else:
-            day_str = f"⬜{day:>2}"
-
-        calendar_line += day_str + " "
+            parts.append(_DAY_WHITE[day])
 
         # New line after Sunday
         if (first_weekday + day) % 7 == 0:
-            text += calendar_line + "\n"
-            calendar_line = ""
+            parts.append("\n")
 
-    # Add remaining days
-    if calendar_line:
-        text += calendar_line + "\n"
+    # End an unfinished last week
+    if (first_weekday + num_days) % 7:
+        parts.append("\n")
 
     total_points = sum(user_data[5:10]) if len(user_data) > 9 else 0
-    text += f"\nTotal Points: {total_points}"
+    parts.append(f"\nTotal Points: {total_points}")
+    text = "".join(parts)
 
     keyboard = [
         [InlineKeyboardButton("📊 Stats View", callback_data="my_stats")],
         [InlineKeyboardButton("Back to Menu", callback_data="back_to_menu")]
     ]
-    await query.edit_message_text(text, reply_markup=InlineKeyboardMarkup(keyboard))
+    return text, InlineKeyboardMarkup(keyboard)
 
 
 async def habit_calendar_view(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -633,84 +663,65 @@ async def habit_calendar_view(update: Update, context: ContextTypes.DEFAULT_TYPE
     query = update.callback_query
     await query.answer()
 
-    habit_id = int(query.data.split('_')[2])
+    habit_id = callback_id(query.data)
     user_id = update.effective_user.id
-    user_data = db.get_user(user_id)
+    user_data = await get_user_cached(user_id)
 
     if not user_data or not user_data[3]:
         await query.edit_message_text("You need to join a group first!")
         return
 
     # Get habit info
-    conn = db.get_connection()
-    cursor = conn.cursor()
-    cursor.execute('SELECT name FROM habits WHERE id = ?', (habit_id,))
-    habit = cursor.fetchone()
-    conn.close()
+    habit_name = await get_habit_name_cached(habit_id)
 
-    if not habit:
+    if habit_name is None:
         await query.edit_message_text("Habit not found!")
         return
 
-    habit_name = habit[0]
-
     now = datetime.now()
     year = now.year
     month = now.month
 
-    # Get number of days in month
-    num_days = calendar.monthrange(year, month)[1]
-    first_weekday = calendar.monthrange(year, month)[0]
-
-    # Get all completions for this habit
-    completions = db.get_user_completions_for_month(user_id, year, month)
+    num_days, first_weekday, month_title, leading_cells = _month_layout(year, month)
 
     # Get days when this specific habit was completed
-    completed_days = set()
-    for completion in completions:
-        if completion[2] == habit_id:  # habit_id column
-            date = completion[3]  # completion_date
-            day = int(date.split('-')[2])
-            completed_days.add(day)
+    completed_days = await run_db(db.get_habit_completed_days, user_id, habit_id, year, month)
 
     # Build calendar
-    text = f"📆 Calendar - {habit_name}\n"
-    text += f"{now.strftime('%B %Y')}\n\n"
-    text += "🟢 Done | ⬜ Not done | ⬛ Future\n\n"
-
-    # Weekday headers
-    text += "Mo  Tu  We  Th  Fr  Sa  Su\n"
+    parts = [
+        f"📆 Calendar - {habit_name}\n",
+        f"{month_title}\n\n",
+        _LEGEND_HABIT,
+        # Weekday headers
+        _WEEKDAY_HEADER,
+    ]
 
-    # Add leading spaces for first week
+    # Leading empty cells for the first week, then one cell per day
     today = now.day
-    calendar_line = ""
-    for i in range(first_weekday):
-        calendar_line += "    "
+    parts.append(leading_cells)
 
     for day in range(1, num_days + 1):
         if day > today:
             # Future days
-            day_str = f"⬛{day:>2}"
+            parts.append(_DAY_BLACK[day])
         elif day in completed_days:
-            day_str = f"🟢{day:>2}"
+            parts.append(_DAY_GREEN[day])
         else:
-            day_str = f"⬜{day:>2}"
-
-        calendar_line += day_str + " "
+            parts.append(_DAY_WHITE[day])
 
         # New line after Sunday
         if (first_weekday + day) % 7 == 0:
-            text += calendar_line + "\n"
-            calendar_line = ""
+            parts.append("\n")
 
-    # Add remaining days
-    if calendar_line:
-        text += calendar_line + "\n"
+    # End an unfinished last week
+    if (first_weekday + num_days) % 7:
+        parts.append("\n")
 
     # Calculate completion rate
     if today > 0:
         completion_rate = (len(completed_days) / today) * 100
-        text += f"\nCompletion Rate: {completion_rate:.1f}% ({len(completed_days)}/{today} days)"
+        parts.append(f"\nCompletion Rate: {completion_rate:.1f}% ({len(completed_days)}/{today} days)")
+    text = "".join(parts)
 
     keyboard = [
         [InlineKeyboardButton("📊 Back to Stats", callback_data="my_stats")],
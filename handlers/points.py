@@ -8,9 +8,11 @@ with a 2:1 conversion ratio.
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes, ConversationHandler
 
-from database import Database, POINT_TYPES
+from database import Database, NON_ANY_POINT_TYPES
 from constants import CONVERTING_POINTS_FROM, CONVERTING_POINTS_TO, CONVERTING_POINTS_AMOUNT
-from utils import format_points_display, get_main_menu_keyboard
+from utils import format_points_display, get_main_menu_keyboard, point_type_label, run_db
+from utils.callbacks import callback_arg
+from utils.cache import invalidate_views, invalidate_user, get_user_points_cached
 
 # Initialize database
 db = Database()
@@ -22,18 +24,15 @@ async def convert_points_start(update: Update, context: ContextTypes.DEFAULT_TYP
     await query.answer()
 
     user_id = update.effective_user.id
-    user_points = db.get_user_points(user_id)
+    user_points = await get_user_points_cached(user_id)
 
     text = "Convert Points (2:1 ratio)\n\nYour Points:\n"
     text += format_points_display(user_points)
     text += "\n\nSelect the point type you want to convert FROM:"
 
     keyboard = []
-    for ptype, emoji in POINT_TYPES.items():
-        if ptype == 'any':  # Skip 'any' for conversions
-            continue
+    for ptype, emoji, type_name in NON_ANY_POINT_TYPES:
         if user_points.get(ptype, 0) >= 2:  # Need at least 2 to convert
-            type_name = ptype.replace('_', ' ').title()
             keyboard.append([InlineKeyboardButton(
                 f"{emoji} {type_name} ({user_points[ptype]})",
                 callback_data=f"convertfrom_{ptype}"
@@ -55,25 +54,21 @@ async def convert_points_select_to(update: Update, context: ContextTypes.DEFAULT
     query = update.callback_query
     await query.answer()
 
-    from_type = query.data.replace('convertfrom_', '')
+    from_type = callback_arg(query.data)
     context.user_data['convert_from_type'] = from_type
 
     user_id = update.effective_user.id
-    user_points = db.get_user_points(user_id)
+    user_points = await get_user_points_cached(user_id)
 
-    from_emoji = POINT_TYPES.get(from_type, '⭐')
-    from_name = from_type.replace('_', ' ').title()
+    from_emoji, from_name = point_type_label(from_type)
 
     text = f"Converting FROM: {from_emoji} {from_name}\n"
     text += f"Available: {user_points.get(from_type, 0)}\n\n"
     text += "Select the point type you want to convert TO:"
 
     keyboard = []
-    for ptype, emoji in POINT_TYPES.items():
-        if ptype == 'any':  # Skip 'any' for conversions
-            continue
+    for ptype, emoji, type_name in NON_ANY_POINT_TYPES:
         if ptype != from_type:  # Can't convert to same type
-            type_name = ptype.replace('_', ' ').title()
             keyboard.append([InlineKeyboardButton(
                 f"{emoji} {type_name}",
                 callback_data=f"convertto_{ptype}"
@@ -90,17 +85,15 @@ async def convert_points_select_amount(update: Update, context: ContextTypes.DEF
     query = update.callback_query
     await query.answer()
 
-    to_type = query.data.replace('convertto_', '')
+    to_type = callback_arg(query.data)
     context.user_data['convert_to_type'] = to_type
 
     from_type = context.user_data.get('convert_from_type')
     user_id = update.effective_user.id
-    user_points = db.get_user_points(user_id)
+    user_points = await get_user_points_cached(user_id)
 
-    from_emoji = POINT_TYPES.get(from_type, '⭐')
-    from_name = from_type.replace('_', ' ').title()
-    to_emoji = POINT_TYPES.get(to_type, '⭐')
-    to_name = to_type.replace('_', ' ').title()
+    from_emoji, from_name = point_type_label(from_type)
+    to_emoji, to_name = point_type_label(to_type)
 
     available = user_points.get(from_type, 0)
 
@@ -129,19 +122,19 @@ async def convert_points_finish(update: Update, context: ContextTypes.DEFAULT_TY
             return ConversationHandler.END
 
         # Get user's conversion rate based on medals
-        conversion_rate = db.get_conversion_rate(user_id)
-        medal_count = db.get_medal_count(user_id)
+        conversion_rate = await run_db(db.get_conversion_rate, user_id)
+        medal_count = await run_db(db.get_medal_count, user_id)
 
-        success = db.convert_points(user_id, from_type, to_type, amount)
+        success = await run_db(db.convert_points, user_id, from_type, to_type, amount)
+        invalidate_views(user_id)
+        invalidate_user(user_id)
 
         if success:
             converted = int(amount / conversion_rate)
-            from_emoji = POINT_TYPES.get(from_type, '⭐')
-            from_name = from_type.replace('_', ' ').title()
-            to_emoji = POINT_TYPES.get(to_type, '⭐')
-            to_name = to_type.replace('_', ' ').title()
+            from_emoji, from_name = point_type_label(from_type)
+            to_emoji, to_name = point_type_label(to_type)
 
-            user_points = db.get_user_points(user_id)
+            user_points = await get_user_points_cached(user_id)
             text = f"✅ Conversion successful!\n\n"
             text += f"Converted: {amount} {from_emoji} {from_name}\n"
             text += f"Received: {converted} {to_emoji} {to_name}\n"
@@ -11,19 +11,20 @@ from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes
 
 from database import Database
-from utils import get_main_menu_keyboard, format_user_name_with_medals
+from utils import get_main_menu_keyboard, format_user_name_with_medals, run_db
+from utils.cache import cached_render
 
 # Initialize database
 db = Database()
 
 
+@cached_render
 async def monthly_report(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Show monthly leaderboards for best shopkeeper and dungeon master (callback handler)"""
     query = update.callback_query
-    await query.answer()
 
     user_id = update.effective_user.id
-    user_data = db.get_user(user_id)
+    user_data = await run_db(db.get_user, user_id)
 
     if not user_data or not user_data[3]:
         await query.edit_message_text("You need to join a group first!")
@@ -32,7 +33,10 @@ async def monthly_report(update: Update, context: ContextTypes.DEFAULT_TYPE):
     group_id = user_data[3]
     month_name = datetime.now().strftime('%B %Y')
 
-    leaderboard = db.get_monthly_leaderboard(group_id)
+    leaderboard = await run_db(db.get_monthly_leaderboard, group_id)
+    medal_counts = await run_db(db.get_medal_counts, [
+        row[0] for row in leaderboard['shopkeepers'] + leaderboard['dungeon_masters']
+    ])
 
     text = f"📊 Monthly Report - {month_name}\n\n"
 
@@ -43,7 +47,7 @@ async def monthly_report(update: Update, context: ContextTypes.DEFAULT_TYPE):
         for i, (user_id, first_name, username, coins) in enumerate(leaderboard['shopkeepers']):
             medal = medals[i] if i < len(medals) else '  '
             name = first_name or username or f"User {user_id}"
-            name_with_medals = format_user_name_with_medals(user_id, name)
+            name_with_medals = format_user_name_with_medals(name, medal_counts[user_id])
             text += f"{medal} {name_with_medals}: {coins} coins\n"
     else:
         text += "No sales yet this month!\n"
@@ -57,7 +61,7 @@ async def monthly_report(update: Update, context: ContextTypes.DEFAULT_TYPE):
         for i, (user_id, first_name, username, points) in enumerate(leaderboard['dungeon_masters']):
             medal = medals[i] if i < len(medals) else '  '
             name = first_name or username or f"User {user_id}"
-            name_with_medals = format_user_name_with_medals(user_id, name)
+            name_with_medals = format_user_name_with_medals(name, medal_counts[user_id])
             text += f"{medal} {name_with_medals}: {points} points\n"
     else:
         text += "No habits completed yet this month!\n"
@@ -66,13 +70,13 @@ async def monthly_report(update: Update, context: ContextTypes.DEFAULT_TYPE):
         [InlineKeyboardButton("« Back to Group Info", callback_data="group_info")],
         [InlineKeyboardButton("Back to Menu", callback_data="back_to_menu")]
     ]
-    await query.edit_message_text(text, reply_markup=InlineKeyboardMarkup(keyboard))
+    return text, InlineKeyboardMarkup(keyboard)
 
 
 async def monthlyreport(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle /monthlyreport command - show monthly leaderboards"""
     user_id = update.effective_user.id
-    user_data = db.get_user(user_id)
+    user_data = await run_db(db.get_user, user_id)
 
     if not user_data or not user_data[3]:
         await update.message.reply_text("You need to join a group first! Use /start to set up your account.")
@@ -81,7 +85,10 @@ async def monthlyreport(update: Update, context: ContextTypes.DEFAULT_TYPE):
     group_id = user_data[3]
     month_name = datetime.now().strftime('%B %Y')
 
-    leaderboard = db.get_monthly_leaderboard(group_id)
+    leaderboard = await run_db(db.get_monthly_leaderboard, group_id)
+    medal_counts = await run_db(db.get_medal_counts, [
+        row[0] for row in leaderboard['shopkeepers'] + leaderboard['dungeon_masters']
+    ])
 
     text = f"📊 Monthly Report - {month_name}\n\n"
 
@@ -92,7 +99,7 @@ async def monthlyreport(update: Update, context: ContextTypes.DEFAULT_TYPE):
         for i, (user_id, first_name, username, coins) in enumerate(leaderboard['shopkeepers']):
             medal = medals[i] if i < len(medals) else '  '
             name = first_name or username or f"User {user_id}"
-            name_with_medals = format_user_name_with_medals(user_id, name)
+            name_with_medals = format_user_name_with_medals(name, medal_counts[user_id])
             text += f"{medal} {name_with_medals}: {coins} coins\n"
     else:
         text += "No sales yet this month!\n"
@@ -106,7 +113,7 @@ async def monthlyreport(update: Update, context: ContextTypes.DEFAULT_TYPE):
         for i, (user_id, first_name, username, points) in enumerate(leaderboard['dungeon_masters']):
             medal = medals[i] if i < len(medals) else '  '
             name = first_name or username or f"User {user_id}"
-            name_with_medals = format_user_name_with_medals(user_id, name)
+            name_with_medals = format_user_name_with_medals(name, medal_counts[user_id])
             text += f"{medal} {name_with_medals}: {points} points\n"
     else:
         text += "No habits completed yet this month!\n"
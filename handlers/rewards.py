@@ -8,35 +8,51 @@ This module contains all handlers related to the reward shop functionality, incl
 - Flexible payment system for 'any' point type rewards
 """
 
+import asyncio
 import logging
 from datetime import datetime
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes, ConversationHandler
 
-from database import Database, POINT_TYPES
+from database import Database, POINT_TYPES, NON_ANY_POINT_TYPES
 from constants import ADDING_REWARD, ADDING_REWARD_TYPE, BUYING_ANY_REWARD
 from utils.keyboards import get_main_menu_keyboard, get_reward_point_type_keyboard
-from utils.formatters import format_points_display
+from utils.formatters import format_points_display, point_type_label
 from utils.announcements import send_group_announcement
+from utils.db_executor import run_db
+from utils.cache import cached_render, invalidate_views, invalidate_user, get_user_points_cached
+from utils.callbacks import callback_arg, callback_id
 
 logger = logging.getLogger(__name__)
 db = Database()
 
+# Static, so built once and shared (InlineKeyboardMarkup is immutable)
+_BACK_TO_MENU_MARKUP = InlineKeyboardMarkup([[InlineKeyboardButton("Back to Menu", callback_data="back_to_menu")]])
+_BACK_TO_SHOP_MARKUP = InlineKeyboardMarkup([[InlineKeyboardButton("Back", callback_data="reward_shop")]])
 
+
+async def _notify_seller(context: ContextTypes.DEFAULT_TYPE, seller_id: int, text: str):
+    """DM the seller about a sale; a blocked or unknown chat is only logged"""
+    try:
+        await context.bot.send_message(chat_id=seller_id, text=text)
+    except Exception as e:
+        logger.warning(f"Could not notify seller {seller_id}: {e}")
+
+
+@cached_render
 async def reward_shop(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Show reward shop - list all group members to see their rewards"""
     query = update.callback_query
-    await query.answer()
 
     user_id = update.effective_user.id
-    user_data = db.get_user(user_id)
+    user_data = await run_db(db.get_user, user_id)
 
     if not user_data or not user_data[3]:
         await query.edit_message_text("You need to join a group first!")
         return
 
     group_id = user_data[3]
-    members = db.get_group_members(group_id)
+    members = await run_db(db.get_group_members, group_id)
 
     keyboard = []
 
@@ -55,9 +71,9 @@ async def reward_shop(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     # Calculate total points from typed points
     total_points = sum(user_data[5:10]) if len(user_data) > 9 else 0
-    await query.edit_message_text(
+    return (
         f"Reward Shop\nYour points: {total_points}\n\nSelect a member to view their rewards:",
-        reply_markup=InlineKeyboardMarkup(keyboard)
+        InlineKeyboardMarkup(keyboard)
     )
 
 
@@ -66,14 +82,11 @@ async def view_shop(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
     await query.answer()
 
-    owner_id = int(query.data.split('_')[2])
+    owner_id = callback_id(query.data)
     user_id = update.effective_user.id
-    user_data = db.get_user(user_id)
-    owner_data = db.get_user(owner_id)
+    owner_data, rewards, user_points = await run_db(db.get_shop_view, owner_id, user_id)
 
     owner_name = owner_data[2] or owner_data[1] or f"User {owner_id}"
-    rewards = db.get_user_rewards(owner_id)
-    user_points = db.get_user_points(user_id)
 
     if not rewards:
         text = f"{owner_name}'s Shop\n\nNo rewards available."
@@ -88,8 +101,7 @@ async def view_shop(update: Update, context: ContextTypes.DEFAULT_TYPE):
             price = reward[3]
             point_type = reward[6] if len(reward) > 6 else 'other'  # point_type column
 
-            type_emoji = POINT_TYPES.get(point_type, '⭐')
-            type_name = point_type.replace('_', ' ').title()
+            type_emoji, type_name = point_type_label(point_type)
 
             text += f"{reward_name} - {price} {type_emoji} {type_name}\n"
 
@@ -110,15 +122,17 @@ async def bazar(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await query.answer()
 
     user_id = update.effective_user.id
-    user_data = db.get_user(user_id)
+    user_data = await run_db(db.get_user, user_id)
 
     if not user_data or not user_data[3]:
         await query.edit_message_text("You need to join a group first!")
         return
 
     group_id = user_data[3]
-    rewards = db.get_all_group_rewards(group_id)
-    user_points = db.get_user_points(user_id)
+    rewards, user_points = await asyncio.gather(
+        run_db(db.get_all_group_rewards, group_id),
+        get_user_points_cached(user_id),
+    )
 
     if not rewards:
         text = "🏪 Bazar\n\nNo rewards available in the group yet."
@@ -141,8 +155,7 @@ async def bazar(update: Update, context: ContextTypes.DEFAULT_TYPE):
             # Get owner display name
             owner_display = owner_first_name or owner_username or f"User {owner_id}"
 
-            type_emoji = POINT_TYPES.get(point_type, '⭐')
-            type_name = point_type.replace('_', ' ').title()
+            type_emoji, type_name = point_type_label(point_type)
 
             # Show owner name with each item
             button_text = f"{reward_name} ({price} {type_emoji}) - {owner_display}"
@@ -169,15 +182,11 @@ async def buy_reward(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
     await query.answer()
 
-    reward_id = int(query.data.split('_')[2])
+    reward_id = callback_id(query.data)
     user_id = update.effective_user.id
 
     # Get reward info
-    conn = db.get_connection()
-    cursor = conn.cursor()
-    cursor.execute('SELECT owner_id, name, price, point_type FROM rewards WHERE id = ?', (reward_id,))
-    reward = cursor.fetchone()
-    conn.close()
+    reward = await run_db(db.query_one, 'SELECT owner_id, name, price, point_type FROM rewards WHERE id = ?', (reward_id,))
 
     if not reward:
         await query.edit_message_text("Reward not found.")
@@ -188,22 +197,22 @@ async def buy_reward(update: Update, context: ContextTypes.DEFAULT_TYPE):
     # If point_type is 'any', let user choose how to pay
     if point_type == 'any':
         # Store reward info for payment flow
-        context.user_data['buying_reward_id'] = reward_id
-        context.user_data['buying_reward_name'] = reward_name
-        context.user_data['buying_reward_price'] = price
-        context.user_data['buying_seller_id'] = seller_id
-        context.user_data['payment_allocation'] = {}  # Will store {point_type: amount}
+        context.user_data['buying'] = {
+            'reward_id': reward_id,
+            'reward_name': reward_name,
+            'price': price,
+            'seller_id': seller_id,
+            'allocation': {},  # Will store {point_type: amount}
+        }
 
         # Show payment selection
-        user_points = db.get_user_points(user_id)
+        user_points = await get_user_points_cached(user_id)
         total_points = sum(user_points.values())
 
         if total_points < price:
             await query.edit_message_text(
                 f"Not enough points! You need {price} points but only have {total_points} total.",
-                reply_markup=InlineKeyboardMarkup([[
-                    InlineKeyboardButton("Back", callback_data="reward_shop")
-                ]])
+                reply_markup=_BACK_TO_SHOP_MARKUP
             )
             return
 
@@ -215,12 +224,9 @@ async def buy_reward(update: Update, context: ContextTypes.DEFAULT_TYPE):
         text += "Click a point type to allocate points."
 
         keyboard = []
-        for ptype, emoji in POINT_TYPES.items():
-            if ptype == 'any':
-                continue
+        for ptype, emoji, type_name in NON_ANY_POINT_TYPES:
             available = user_points.get(ptype, 0)
             if available > 0:
-                type_name = ptype.replace('_', ' ').title()
                 keyboard.append([InlineKeyboardButton(
                     f"{emoji} {type_name} ({available} available)",
                     callback_data=f"payselect_{ptype}"
@@ -233,50 +239,43 @@ async def buy_reward(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return BUYING_ANY_REWARD
 
     # Original flow for specific point types
-    success = db.buy_reward(user_id, seller_id, reward_id)
+    success = await run_db(db.buy_reward, user_id, seller_id, reward_id)
+    invalidate_views(user_id, seller_id)
+    invalidate_user(user_id, seller_id)
 
     if success:
-        # Notify the buyer
-        await query.edit_message_text(
-            f"Successfully purchased '{reward_name}' for {price} points!\n\n"
-            "The seller will fulfill your reward.",
-            reply_markup=InlineKeyboardMarkup([[
-                InlineKeyboardButton("Back to Menu", callback_data="back_to_menu")
-            ]])
-        )
-
-        # Notify the seller
         buyer_name = update.effective_user.first_name or update.effective_user.username or "Someone"
-        try:
-            await context.bot.send_message(
-                chat_id=seller_id,
-                text=f"🎉 Great news! {buyer_name} just bought your reward:\n\n"
-                     f"'{reward_name}' for {price} points!\n\n"
-                     f"Don't forget to fulfill this reward for them."
-            )
-        except Exception as e:
-            logger.warning(f"Could not notify seller {seller_id}: {e}")
-
-        # Announce purchase to group
-        user_data = db.get_user(user_id)
-        group_id = user_data[3]
-        seller_data = db.get_user(seller_id)
+        users = await run_db(db.get_users, [user_id, seller_id])
+        group_id = users[user_id][3]
+        seller_data = users[seller_id]
         seller_name = seller_data[2] or seller_data[1] or "Someone"
 
-        type_emoji = POINT_TYPES.get(point_type, '⭐')
-        type_name = point_type.replace('_', ' ').title()
+        type_emoji, type_name = point_type_label(point_type)
 
         announcement = f"💰 Purchase Made!\n\n"
         announcement += f"{buyer_name} bought '{reward_name}' from {seller_name}'s shop\n"
         announcement += f"Price: {price} {type_emoji} {type_name} points"
 
-        await send_group_announcement(context, group_id, announcement)
+        # Buyer confirmation, seller DM and group announcement are independent
+        # API calls - send them concurrently
+        await asyncio.gather(
+            query.edit_message_text(
+                f"Successfully purchased '{reward_name}' for {price} points!\n\n"
+                "The seller will fulfill your reward.",
+                reply_markup=_BACK_TO_MENU_MARKUP
+            ),
+            _notify_seller(
+                context, seller_id,
+                f"🎉 Great news! {buyer_name} just bought your reward:\n\n"
+                f"'{reward_name}' for {price} points!\n\n"
+                f"Don't forget to fulfill this reward for them."
+            ),
+            send_group_announcement(context, group_id, announcement),
+        )
     else:
         await query.edit_message_text(
             f"Not enough points! You need {price} points.",
-            reply_markup=InlineKeyboardMarkup([[
-                InlineKeyboardButton("Back", callback_data="reward_shop")
-            ]])
+            reply_markup=_BACK_TO_SHOP_MARKUP
         )
 
 
@@ -285,24 +284,26 @@ async def payment_select_type(update: Update, context: ContextTypes.DEFAULT_TYPE
     query = update.callback_query
     await query.answer()
 
-    point_type = query.data.replace('payselect_', '')
+    point_type = callback_arg(query.data)
     user_id = update.effective_user.id
-    user_points = db.get_user_points(user_id)
+    user_points = await get_user_points_cached(user_id)
+
+    buying = context.user_data.get('buying', {})
+    allocation = buying.get('allocation', {})
 
     available = user_points.get(point_type, 0)
-    allocated = context.user_data.get('payment_allocation', {}).get(point_type, 0)
+    allocated = allocation.get(point_type, 0)
     remaining_available = available - allocated
 
-    price = context.user_data.get('buying_reward_price', 0)
-    current_total = sum(context.user_data.get('payment_allocation', {}).values())
+    price = buying.get('price', 0)
+    current_total = sum(allocation.values())
     remaining_needed = price - current_total
 
     if remaining_available <= 0:
         await query.answer("No more of this point type available!", show_alert=True)
         return BUYING_ANY_REWARD
 
-    type_emoji = POINT_TYPES.get(point_type, '⭐')
-    type_name = point_type.replace('_', ' ').title()
+    type_emoji, type_name = point_type_label(point_type)
 
     text = f"How many {type_emoji} {type_name} points?\n\n"
     text += f"Available: {remaining_available}\n"
@@ -329,17 +330,18 @@ async def payment_add_amount(update: Update, context: ContextTypes.DEFAULT_TYPE)
     query = update.callback_query
     await query.answer()
 
-    parts = query.data.split('_')
-    point_type = '_'.join(parts[1:-1])  # Handle food_related
-    amount = int(parts[-1])
+    # "payamount_<type>_<amount>" - the type itself may contain '_' (food_related)
+    prefix_and_type, _, amount = query.data.rpartition('_')
+    point_type = prefix_and_type.partition('_')[2]
+    amount = int(amount)
 
     user_id = update.effective_user.id
-    user_points = db.get_user_points(user_id)
+    user_points = await get_user_points_cached(user_id)
 
-    if 'payment_allocation' not in context.user_data:
-        context.user_data['payment_allocation'] = {}
+    buying = context.user_data.setdefault('buying', {})
+    allocation = buying.setdefault('allocation', {})
 
-    current_allocated = context.user_data['payment_allocation'].get(point_type, 0)
+    current_allocated = allocation.get(point_type, 0)
     available = user_points.get(point_type, 0)
 
     # Check if we can allocate this amount
@@ -347,15 +349,15 @@ async def payment_add_amount(update: Update, context: ContextTypes.DEFAULT_TYPE)
         await query.answer("Not enough points available!", show_alert=True)
         return BUYING_ANY_REWARD
 
-    price = context.user_data.get('buying_reward_price', 0)
-    current_total = sum(context.user_data['payment_allocation'].values())
+    price = buying.get('price', 0)
+    current_total = sum(allocation.values())
 
     if current_total + amount > price:
         await query.answer("This would exceed the total cost!", show_alert=True)
         return BUYING_ANY_REWARD
 
     # Add the amount
-    context.user_data['payment_allocation'][point_type] = current_allocated + amount
+    allocation[point_type] = current_allocated + amount
 
     # Return to payment selection screen
     return await show_payment_screen(update, context)
@@ -366,51 +368,45 @@ async def show_payment_screen(update: Update, context: ContextTypes.DEFAULT_TYPE
     query = update.callback_query
     user_id = update.effective_user.id
 
-    reward_name = context.user_data.get('buying_reward_name', 'Unknown')
-    price = context.user_data.get('buying_reward_price', 0)
-    allocation = context.user_data.get('payment_allocation', {})
+    buying = context.user_data.get('buying', {})
+    reward_name = buying.get('reward_name', 'Unknown')
+    price = buying.get('price', 0)
+    allocation = buying.get('allocation', {})
 
-    user_points = db.get_user_points(user_id)
+    user_points = await get_user_points_cached(user_id)
     total_allocated = sum(allocation.values())
 
-    text = f"🌟 Flexible Payment for '{reward_name}'\n\n"
-    text += f"Total cost: {price} points\n"
-    text += f"Allocated: {total_allocated}/{price}\n\n"
+    parts = [
+        f"🌟 Flexible Payment for '{reward_name}'\n\n",
+        f"Total cost: {price} points\n",
+        f"Allocated: {total_allocated}/{price}\n\n",
+    ]
 
     if allocation:
-        text += "Your payment breakdown:\n"
+        parts.append("Your payment breakdown:\n")
         for ptype, amount in allocation.items():
-            emoji = POINT_TYPES.get(ptype, '⭐')
-            pname = ptype.replace('_', ' ').title()
-            text += f"  {emoji} {pname}: {amount}\n"
-        text += "\n"
-
-    text += "Available points:\n"
-    for ptype, emoji in POINT_TYPES.items():
-        if ptype == 'any':
-            continue
-        available = user_points.get(ptype, 0)
-        allocated_this = allocation.get(ptype, 0)
-        remaining = available - allocated_this
-        if available > 0:
-            pname = ptype.replace('_', ' ').title()
-            text += f"  {emoji} {pname}: {remaining}/{available}\n"
+            emoji, pname = point_type_label(ptype)
+            parts.append(f"  {emoji} {pname}: {amount}\n")
+        parts.append("\n")
 
+    parts.append("Available points:\n")
     keyboard = []
+    still_needed = total_allocated < price
 
-    # Show buttons for types with available points
-    for ptype, emoji in POINT_TYPES.items():
-        if ptype == 'any':
-            continue
+    # One pass builds both the availability lines and the buttons for types
+    # with points left to allocate
+    for ptype, emoji, pname in NON_ANY_POINT_TYPES:
         available = user_points.get(ptype, 0)
-        allocated_this = allocation.get(ptype, 0)
-        remaining = available - allocated_this
-        if remaining > 0 and total_allocated < price:
-            pname = ptype.replace('_', ' ').title()
+        if available <= 0:
+            continue
+        remaining = available - allocation.get(ptype, 0)
+        parts.append(f"  {emoji} {pname}: {remaining}/{available}\n")
+        if remaining > 0 and still_needed:
             keyboard.append([InlineKeyboardButton(
                 f"{emoji} {pname} ({remaining} available)",
                 callback_data=f"payselect_{ptype}"
             )])
+    text = "".join(parts)
 
     # Confirm button (enabled only if exact amount)
     if total_allocated == price:
@@ -433,7 +429,7 @@ async def payment_clear(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
     await query.answer("Payment cleared!")
 
-    context.user_data['payment_allocation'] = {}
+    context.user_data.setdefault('buying', {})['allocation'] = {}
     return await show_payment_screen(update, context)
 
 
@@ -443,11 +439,12 @@ async def payment_confirm(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await query.answer()
 
     user_id = update.effective_user.id
-    reward_id = context.user_data.get('buying_reward_id')
-    reward_name = context.user_data.get('buying_reward_name')
-    price = context.user_data.get('buying_reward_price')
-    seller_id = context.user_data.get('buying_seller_id')
-    allocation = context.user_data.get('payment_allocation', {})
+    buying = context.user_data.get('buying', {})
+    reward_id = buying.get('reward_id')
+    reward_name = buying.get('reward_name')
+    price = buying.get('price')
+    seller_id = buying.get('seller_id')
+    allocation = buying.get('allocation', {})
 
     total_allocated = sum(allocation.values())
 
@@ -456,75 +453,58 @@ async def payment_confirm(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return BUYING_ANY_REWARD
 
     # Process custom payment
-    success = db.buy_reward_custom(user_id, seller_id, reward_id, allocation)
+    success = await run_db(db.buy_reward_custom, user_id, seller_id, reward_id, allocation)
+    invalidate_views(user_id, seller_id)
+    invalidate_user(user_id, seller_id)
 
     if success:
         # Show success message
         payment_details = "\n".join([
-            f"  {POINT_TYPES.get(ptype, '⭐')} {ptype.replace('_', ' ').title()}: {amount}"
+            "  {} {}: {}".format(*point_type_label(ptype), amount)
             for ptype, amount in allocation.items()
         ])
 
-        await query.edit_message_text(
-            f"✅ Successfully purchased '{reward_name}'!\n\n"
-            f"Payment breakdown:\n{payment_details}\n\n"
-            "The seller will fulfill your reward.",
-            reply_markup=InlineKeyboardMarkup([[
-                InlineKeyboardButton("Back to Menu", callback_data="back_to_menu")
-            ]])
-        )
-
-        # Notify seller
         buyer_name = update.effective_user.first_name or update.effective_user.username or "Someone"
-        try:
-            await context.bot.send_message(
-                chat_id=seller_id,
-                text=f"🎉 Great news! {buyer_name} just bought your reward:\n\n"
-                     f"'{reward_name}' for {price} points!\n\n"
-                     f"Payment breakdown:\n{payment_details}\n\n"
-                     f"Don't forget to fulfill this reward for them."
-            )
-        except Exception as e:
-            logger.warning(f"Could not notify seller {seller_id}: {e}")
-
-        # Announce purchase to group
-        user_data = db.get_user(user_id)
-        group_id = user_data[3]
-        seller_data = db.get_user(seller_id)
+        users = await run_db(db.get_users, [user_id, seller_id])
+        group_id = users[user_id][3]
+        seller_data = users[seller_id]
         seller_name = seller_data[2] or seller_data[1] or "Someone"
 
         announcement = f"💰 Purchase Made!\n\n"
         announcement += f"{buyer_name} bought '{reward_name}' from {seller_name}'s shop\n"
         announcement += f"Price: {price} points (any combination)"
 
-        await send_group_announcement(context, group_id, announcement)
+        await asyncio.gather(
+            query.edit_message_text(
+                f"✅ Successfully purchased '{reward_name}'!\n\n"
+                f"Payment breakdown:\n{payment_details}\n\n"
+                "The seller will fulfill your reward.",
+                reply_markup=_BACK_TO_MENU_MARKUP
+            ),
+            _notify_seller(
+                context, seller_id,
+                f"🎉 Great news! {buyer_name} just bought your reward:\n\n"
+                f"'{reward_name}' for {price} points!\n\n"
+                f"Payment breakdown:\n{payment_details}\n\n"
+                f"Don't forget to fulfill this reward for them."
+            ),
+            send_group_announcement(context, group_id, announcement),
+        )
 
         # Clear context
-        context.user_data.pop('buying_reward_id', None)
-        context.user_data.pop('buying_reward_name', None)
-        context.user_data.pop('buying_reward_price', None)
-        context.user_data.pop('buying_seller_id', None)
-        context.user_data.pop('payment_allocation', None)
+        context.user_data.pop('buying', None)
 
         return ConversationHandler.END
     else:
         await query.edit_message_text(
             "❌ Payment failed! Please try again.",
-            reply_markup=InlineKeyboardMarkup([[
-                InlineKeyboardButton("Back", callback_data="reward_shop")
-            ]])
+            reply_markup=_BACK_TO_SHOP_MARKUP
         )
         return ConversationHandler.END
 
 
-async def my_rewards(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Show user's own reward shop"""
-    query = update.callback_query
-    await query.answer()
-
-    user_id = update.effective_user.id
-    rewards = db.get_user_rewards(user_id)
-
+def _render_my_rewards(rewards):
+    """(text, reply_markup) of the user's own reward shop"""
     text = "My Reward Shop:\n\n"
 
     if not rewards:
@@ -540,7 +520,13 @@ async def my_rewards(update: Update, context: ContextTypes.DEFAULT_TYPE):
         [InlineKeyboardButton("Back to Menu", callback_data="back_to_menu")],
     ]
 
-    await query.edit_message_text(text, reply_markup=InlineKeyboardMarkup(keyboard))
+    return text, InlineKeyboardMarkup(keyboard)
+
+
+@cached_render
+async def my_rewards(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Show user's own reward shop"""
+    return _render_my_rewards(await run_db(db.get_user_rewards, update.effective_user.id))
 
 
 async def add_reward_start(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -594,18 +580,18 @@ async def add_reward_finish(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
     await query.answer()
 
-    point_type = query.data.replace('habittype_', '')  # Extract from "habittype_food_related" or "habittype_any"
+    point_type = callback_arg(query.data)  # Extract from "habittype_food_related" or "habittype_any"
     name = context.user_data.get('new_reward_name')
     price = context.user_data.get('new_reward_price')
     user_id = update.effective_user.id
 
-    db.add_reward(user_id, name, price, point_type)
+    await run_db(db.add_reward, user_id, name, price, point_type)
+    invalidate_views(user_id)
 
-    type_emoji = POINT_TYPES.get(point_type, '⭐')
-    type_name = point_type.replace('_', ' ').title()
+    type_emoji, type_name = point_type_label(point_type)
 
     # Announce new reward to group
-    user_data = db.get_user(user_id)
+    user_data = await run_db(db.get_user, user_id)
     group_id = user_data[3]
     user_name = update.effective_user.first_name or update.effective_user.username or "Someone"
 
@@ -628,7 +614,7 @@ async def delete_reward_list(update: Update, context: ContextTypes.DEFAULT_TYPE)
     await query.answer()
 
     user_id = update.effective_user.id
-    rewards = db.get_user_rewards(user_id)
+    rewards = await run_db(db.get_user_rewards, user_id)
 
     if not rewards:
         await query.edit_message_text("No rewards to delete.")
@@ -651,13 +637,17 @@ async def delete_reward_list(update: Update, context: ContextTypes.DEFAULT_TYPE)
 async def delete_reward_confirm(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Delete a reward"""
     query = update.callback_query
-    await query.answer()
 
-    reward_id = int(query.data.split('_')[3])
-    db.delete_reward(reward_id)
+    reward_id = callback_id(query.data)
+    user_id = update.effective_user.id
+    # The remaining rewards come back from the same transaction as the delete
+    rewards = await run_db(db.delete_reward_and_list, user_id, reward_id)
+    invalidate_views(user_id)
 
-    await query.edit_message_text("Reward deleted successfully!")
-    await my_rewards(update, context)
+    # Confirm with a toast and go straight to the updated list
+    await query.answer("Reward deleted!")
+    text, reply_markup = _render_my_rewards(rewards)
+    await query.edit_message_text(text, reply_markup=reply_markup)
 
 
 async def edit_reward_list(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -666,7 +656,7 @@ async def edit_reward_list(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await query.answer()
 
     user_id = update.effective_user.id
-    rewards = db.get_user_rewards(user_id)
+    rewards = await run_db(db.get_user_rewards, user_id)
 
     if not rewards:
         await query.edit_message_text("No rewards to edit.")
@@ -693,22 +683,17 @@ async def edit_reward_select(update: Update, context: ContextTypes.DEFAULT_TYPE)
     query = update.callback_query
     await query.answer()
 
-    reward_id = int(query.data.split('_')[3])
+    reward_id = callback_id(query.data)
 
     # Get reward details
-    conn = db.get_connection()
-    cursor = conn.cursor()
-    cursor.execute('SELECT name, price, point_type FROM rewards WHERE id = ?', (reward_id,))
-    reward = cursor.fetchone()
-    conn.close()
+    reward = await run_db(db.query_one, 'SELECT name, price, point_type FROM rewards WHERE id = ?', (reward_id,))
 
     if not reward:
         await query.edit_message_text("❌ Reward not found!")
         return
 
     name, price, point_type = reward
-    type_emoji = POINT_TYPES.get(point_type, '⭐')
-    type_name = point_type.replace('_', ' ').title()
+    type_emoji, type_name = point_type_label(point_type)
 
     # Store reward ID in context
     context.user_data['editing_reward_id'] = reward_id
@@ -734,15 +719,11 @@ async def edit_reward_name_start(update: Update, context: ContextTypes.DEFAULT_T
     query = update.callback_query
     await query.answer()
 
-    reward_id = int(query.data.split('_')[3])
+    reward_id = callback_id(query.data)
     context.user_data['editing_reward_id'] = reward_id
 
     # Get current name
-    conn = db.get_connection()
-    cursor = conn.cursor()
-    cursor.execute('SELECT name FROM rewards WHERE id = ?', (reward_id,))
-    result = cursor.fetchone()
-    conn.close()
+    result = await run_db(db.query_one, 'SELECT name FROM rewards WHERE id = ?', (reward_id,))
 
     if not result:
         await query.edit_message_text("❌ Reward not found!")
@@ -770,11 +751,8 @@ async def edit_reward_name_finish(update: Update, context: ContextTypes.DEFAULT_
         return ConversationHandler.END
 
     # Update reward name
-    conn = db.get_connection()
-    cursor = conn.cursor()
-    cursor.execute('UPDATE rewards SET name = ? WHERE id = ?', (new_name, reward_id))
-    conn.commit()
-    conn.close()
+    await run_db(db.execute, 'UPDATE rewards SET name = ? WHERE id = ?', (new_name, reward_id))
+    invalidate_views(update.effective_user.id)
 
     await update.message.reply_text(
         f"✅ Reward name updated to: {new_name}",
@@ -792,23 +770,18 @@ async def edit_reward_price_start(update: Update, context: ContextTypes.DEFAULT_
     query = update.callback_query
     await query.answer()
 
-    reward_id = int(query.data.split('_')[3])
+    reward_id = callback_id(query.data)
     context.user_data['editing_reward_id'] = reward_id
 
     # Get current price
-    conn = db.get_connection()
-    cursor = conn.cursor()
-    cursor.execute('SELECT price, point_type FROM rewards WHERE id = ?', (reward_id,))
-    result = cursor.fetchone()
-    conn.close()
+    result = await run_db(db.query_one, 'SELECT price, point_type FROM rewards WHERE id = ?', (reward_id,))
 
     if not result:
         await query.edit_message_text("❌ Reward not found!")
         return ConversationHandler.END
 
     current_price, point_type = result
-    type_emoji = POINT_TYPES.get(point_type, '⭐')
-    type_name = point_type.replace('_', ' ').title()
+    type_emoji, type_name = point_type_label(point_type)
 
     await query.edit_message_text(
         f"Current price: {current_price} {type_emoji} {type_name}\n\n"
@@ -837,11 +810,8 @@ async def edit_reward_price_finish(update: Update, context: ContextTypes.DEFAULT
             return EDITING_REWARD_PRICE
 
         # Update reward price
-        conn = db.get_connection()
-        cursor = conn.cursor()
-        cursor.execute('UPDATE rewards SET price = ? WHERE id = ?', (new_price, reward_id))
-        conn.commit()
-        conn.close()
+        await run_db(db.execute, 'UPDATE rewards SET price = ? WHERE id = ?', (new_price, reward_id))
+        invalidate_views(update.effective_user.id)
 
         await update.message.reply_text(
             f"✅ Reward price updated to: {new_price}",
@@ -10,22 +10,22 @@ from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes
 
 from database import Database
-from utils import get_main_menu_keyboard, send_group_announcement
+from utils import get_main_menu_keyboard, send_group_announcement, run_db
+from utils.cache import cached_render, invalidate_views, invalidate_all_views, invalidate_user
+from utils.callbacks import callback_id
 
 # Initialize database
 db = Database()
 
 
+@cached_render
 async def town_mall(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Show town mall main menu with available items"""
-    query = update.callback_query
-    await query.answer()
-
     user_id = update.effective_user.id
-    user_data = db.get_user(user_id)
+    user_data = await run_db(db.get_user, user_id)
     user_coins = user_data[10] if len(user_data) > 10 else 0
 
-    items = db.get_town_mall_items(available_only=True)
+    items = await run_db(db.get_town_mall_items, available_only=True)
 
     text = "🏪 Welcome to Town Mall!\n\n"
     text += f"💰 Your coins: {user_coins}\n\n"
@@ -62,17 +62,8 @@ async def town_mall(update: Update, context: ContextTypes.DEFAULT_TYPE):
     keyboard.append([InlineKeyboardButton("📜 My Purchases", callback_data="townmall_history")])
     keyboard.append([InlineKeyboardButton("Back to Menu", callback_data="back_to_menu")])
 
-    # Handle both photo and text messages
-    try:
-        await query.edit_message_text(text, reply_markup=InlineKeyboardMarkup(keyboard))
-    except Exception:
-        # If edit fails (message is a photo), delete and send new text message
-        await query.message.delete()
-        await context.bot.send_message(
-            chat_id=update.effective_chat.id,
-            text=text,
-            reply_markup=InlineKeyboardMarkup(keyboard)
-        )
+    # cached_render replaces the message when coming back from an item photo
+    return text, InlineKeyboardMarkup(keyboard)
 
 
 async def view_town_mall_item(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -80,8 +71,8 @@ async def view_town_mall_item(update: Update, context: ContextTypes.DEFAULT_TYPE
     query = update.callback_query
     await query.answer()
 
-    item_id = int(query.data.split('_')[-1])
-    item = db.get_town_mall_item(item_id)
+    item_id = callback_id(query.data)
+    item = await run_db(db.get_town_mall_item, item_id)
 
     if not item:
         await query.edit_message_text(
@@ -96,11 +87,11 @@ async def view_town_mall_item(update: Update, context: ContextTypes.DEFAULT_TYPE
 
     # Get user's coins
     user_id = update.effective_user.id
-    user_data = db.get_user(user_id)
+    user_data = await run_db(db.get_user, user_id)
     user_coins = user_data[10] if len(user_data) > 10 else 0
 
     # Get sponsor info
-    sponsor_data = db.get_user(sponsor_id) if sponsor_id else None
+    sponsor_data = await run_db(db.get_user, sponsor_id) if sponsor_id else None
     sponsor_name = "Unknown"
     if sponsor_data:
         sponsor_name = sponsor_data[2] or sponsor_data[1] or f"User {sponsor_id}"
@@ -176,10 +167,10 @@ async def buy_town_mall_item(update: Update, context: ContextTypes.DEFAULT_TYPE)
     await query.answer()
 
     user_id = update.effective_user.id
-    item_id = int(query.data.split('_')[-1])
+    item_id = callback_id(query.data)
 
     # Get item for announcement
-    item = db.get_town_mall_item(item_id)
+    item = await run_db(db.get_town_mall_item, item_id)
     if not item:
         await query.edit_message_text(
             "❌ Item not found!",
@@ -193,11 +184,17 @@ async def buy_town_mall_item(update: Update, context: ContextTypes.DEFAULT_TYPE)
     item_price = item[3]
 
     # Attempt purchase
-    success, message = db.purchase_town_mall_item(user_id, item_id)
+    success, message = await run_db(db.purchase_town_mall_item, user_id, item_id)
+    invalidate_user(user_id)
+    if success:
+        # The item's stock is shown in every member's cached mall views
+        invalidate_all_views()
+    else:
+        invalidate_views(user_id)
 
     if success:
         # Get updated user coins
-        user_data = db.get_user(user_id)
+        user_data = await run_db(db.get_user, user_id)
         user_coins = user_data[10] if len(user_data) > 10 else 0
         user_name = user_data[2] or user_data[1] or f"User {user_id}"
 
@@ -246,7 +243,7 @@ async def town_mall_purchase_history(update: Update, context: ContextTypes.DEFAU
     await query.answer()
 
     user_id = update.effective_user.id
-    purchases = db.get_user_town_mall_purchases(user_id)
+    purchases = await run_db(db.get_user_town_mall_purchases, user_id)
 
     text = "📜 Your Town Mall Purchases\n\n"
 
@@ -295,7 +292,7 @@ async def town_mall_my_items(update: Update, context: ContextTypes.DEFAULT_TYPE)
     await query.answer()
 
     user_id = update.effective_user.id
-    items = db.get_user_town_mall_items(user_id)
+    items = await run_db(db.get_user_town_mall_items, user_id)
 
     text = "✏️ My Town Mall Items\n\n"
 
@@ -426,7 +423,7 @@ async def town_mall_add_photo(update: Update, context: ContextTypes.DEFAULT_TYPE
             return ConversationHandler.END
 
         user_id = update.effective_user.id
-        item_id = db.add_town_mall_item(
+        item_id = await run_db(db.add_town_mall_item,
             sponsor_id=user_id,
             name=item_data['name'],
             description=item_data['description'],
@@ -434,9 +431,10 @@ async def town_mall_add_photo(update: Update, context: ContextTypes.DEFAULT_TYPE
             image_filename=None,
             stock=item_data['stock']
         )
+        invalidate_all_views()
 
         # Send group announcement
-        user_data = db.get_user(user_id)
+        user_data = await run_db(db.get_user, user_id)
         group_id = user_data[3]
         user_name = update.effective_user.first_name or update.effective_user.username or "Someone"
 
@@ -493,7 +491,7 @@ async def town_mall_add_photo(update: Update, context: ContextTypes.DEFAULT_TYPE
         return ConversationHandler.END
 
     user_id = update.effective_user.id
-    item_id = db.add_town_mall_item(
+    item_id = await run_db(db.add_town_mall_item,
         sponsor_id=user_id,
         name=item_data['name'],
         description=item_data['description'],
@@ -501,9 +499,10 @@ async def town_mall_add_photo(update: Update, context: ContextTypes.DEFAULT_TYPE
         image_filename=filename,
         stock=item_data['stock']
     )
+    invalidate_all_views()
 
     # Send group announcement
-    user_data = db.get_user(user_id)
+    user_data = await run_db(db.get_user, user_id)
     group_id = user_data[3]
     user_name = update.effective_user.first_name or update.effective_user.username or "Someone"
 
@@ -535,11 +534,11 @@ async def town_mall_edit_start(update: Update, context: ContextTypes.DEFAULT_TYP
     query = update.callback_query
     await query.answer()
 
-    item_id = int(query.data.split('_')[-1])
+    item_id = callback_id(query.data)
     user_id = update.effective_user.id
 
     # Get item and verify ownership
-    item = db.get_town_mall_item(item_id)
+    item = await run_db(db.get_town_mall_item, item_id)
     if not item:
         await query.edit_message_text("❌ Item not found!")
         return
@@ -644,13 +643,14 @@ async def town_mall_edit_photo(update: Update, context: ContextTypes.DEFAULT_TYP
     # Check if user sent /keep command
     if update.message.text and update.message.text == '/keep':
         # Keep existing photo, just update details
-        db.update_town_mall_item(
+        await run_db(db.update_town_mall_item,
             item_id=item_id,
             name=item_data['name'],
             description=item_data['description'],
             price_coins=item_data['price'],
             stock=item_data['stock']
         )
+        invalidate_all_views()
 
         await update.message.reply_text(
             f"✅ Item '{item_data['name']}' updated successfully!\n\n"
@@ -670,7 +670,7 @@ async def town_mall_edit_photo(update: Update, context: ContextTypes.DEFAULT_TYP
         return EDITING_TOWNMALL_PHOTO
 
     # Get old item to delete old image
-    old_item = db.get_town_mall_item(item_id)
+    old_item = await run_db(db.get_town_mall_item, item_id)
     old_image_filename = old_item[4] if old_item else None
 
     # Download new photo
@@ -691,7 +691,7 @@ async def town_mall_edit_photo(update: Update, context: ContextTypes.DEFAULT_TYP
     await file.download_to_drive(filepath)
 
     # Update item with new image
-    db.update_town_mall_item(
+    await run_db(db.update_town_mall_item,
         item_id=item_id,
         name=item_data['name'],
         description=item_data['description'],
@@ -699,6 +699,7 @@ async def town_mall_edit_photo(update: Update, context: ContextTypes.DEFAULT_TYP
         image_filename=filename,
         stock=item_data['stock']
     )
+    invalidate_all_views()
 
     # Delete old image if exists
     if old_image_filename:
@@ -7,8 +7,9 @@ from .keyboards import (
     get_habit_type_keyboard,
     get_reward_point_type_keyboard
 )
-from .formatters import format_points_display, format_user_name_with_medals
+from .formatters import format_points_display, format_user_name_with_medals, point_type_label
 from .announcements import send_group_announcement
+from .db_executor import run_db
 
 __all__ = [
     'get_main_menu_keyboard',
@@ -16,5 +17,7 @@ __all__ = [
     'get_reward_point_type_keyboard',
     'format_points_display',
     'format_user_name_with_medals',
+    'point_type_label',
     'send_group_announcement',
+    'run_db',
 ]
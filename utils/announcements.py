@@ -5,14 +5,26 @@ Group announcement utilities
 import logging
 from telegram.ext import ContextTypes
 from database import Database
+from utils.db_executor import run_db
 
 logger = logging.getLogger(__name__)
 db = Database()
 
+# bot_data key for the {group_id: chat_id} map, preloaded at startup
+GROUP_CHAT_IDS = 'group_chat_ids'
+
+
+def remember_group_chat(context: ContextTypes.DEFAULT_TYPE, group_id: int, chat_id: int):
+    """Update the cached chat for a group after it was (re)linked"""
+    context.bot_data.setdefault(GROUP_CHAT_IDS, {})[group_id] = chat_id
+
 
 async def send_group_announcement(context: ContextTypes.DEFAULT_TYPE, group_id: int, message: str):
     """Send an announcement to the group chat if configured"""
-    chat_id = db.get_group_chat_id(group_id)
+    chat_ids = context.bot_data.setdefault(GROUP_CHAT_IDS, {})
+    if group_id not in chat_ids:
+        chat_ids[group_id] = await run_db(db.get_group_chat_id, group_id)
+    chat_id = chat_ids[group_id]
     if chat_id:
         try:
             await context.bot.send_message(chat_id=chat_id, text=message)
@@ -0,0 +1,131 @@
+"""
+Short-lived caches for rendered read-only views and user rows
+"""
+
+from functools import wraps
+from cachetools import LRUCache, TTLCache
+from telegram import Update
+from telegram.ext import ContextTypes
+from database import Database
+from utils.db_executor import run_db
+
+db = Database()
+
+# user_id -> {callback_data: (text, reply_markup)}
+RESPONSE_CACHE = TTLCache(maxsize=10_000, ttl=30)
+
+# user_id -> users row. A row is reused for this long, which covers the repeated
+# lookups of a single interaction (e.g. toggle_habit -> my_habits) and quick menu
+# hopping; every write that changes a user's row invalidates it right away
+USER_CACHE_TTL = 2.0
+USER_CACHE = TTLCache(maxsize=10_000, ttl=USER_CACHE_TTL)
+
+# user_id -> points dict from db.get_user_points(), kept and invalidated with USER_CACHE
+POINTS_CACHE = TTLCache(maxsize=10_000, ttl=USER_CACHE_TTL)
+
+# habit_id -> name. Names only change through edit/delete, which invalidate them
+HABIT_NAME_CACHE = LRUCache(maxsize=1024)
+
+
+def cached_render(handler):
+    """Serve a read-only callback view from RESPONSE_CACHE.
+
+    The wrapped handler returns (text, reply_markup) to have the view shown and
+    cached, or None if it already replied itself (e.g. an error message).
+    """
+    @wraps(handler)
+    async def wrapper(update: Update, context: ContextTypes.DEFAULT_TYPE):
+        query = update.callback_query
+        await query.answer()
+
+        user_id = update.effective_user.id
+        views = RESPONSE_CACHE.get(user_id)
+        view = views.get(query.data) if views is not None else None
+        if view is None:
+            view = await handler(update, context)
+            if view is None:
+                return
+            if views is None:
+                views = RESPONSE_CACHE[user_id] = {}
+            views[query.data] = view
+
+        text, reply_markup = view
+        if query.message.photo:
+            # Photo captions can't be edited into text - replace the message
+            await query.message.delete()
+            await context.bot.send_message(
+                chat_id=update.effective_chat.id,
+                text=text,
+                reply_markup=reply_markup
+            )
+        else:
+            await query.edit_message_text(text, reply_markup=reply_markup)
+
+    return wrapper
+
+
+def invalidate_views(*user_ids: int):
+    """Drop cached views of users whose data just changed"""
+    for user_id in user_ids:
+        RESPONSE_CACHE.pop(user_id, None)
+
+
+def invalidate_all_views():
+    """Drop every user's cached views after a change to shared data (mall stock, group awards)"""
+    RESPONSE_CACHE.clear()
+
+
+async def get_user_cached(user_id: int):
+    """db.get_user() with a short-lived process-wide copy in USER_CACHE"""
+    user_data = USER_CACHE.get(user_id)
+    if user_data is None:
+        user_data = await run_db(db.get_user, user_id)
+        if user_data is not None:
+            USER_CACHE[user_id] = user_data
+    return user_data
+
+
+async def get_user_points_cached(user_id: int):
+    """db.get_user_points() with a short-lived process-wide copy in POINTS_CACHE.
+
+    Points are read by column name - the position of the point columns in a
+    users row differs between fresh and migrated databases.
+    """
+    user_points = POINTS_CACHE.get(user_id)
+    if user_points is None:
+        user_points = POINTS_CACHE[user_id] = await run_db(db.get_user_points, user_id)
+    return user_points
+
+
+def invalidate_user(*user_ids: int):
+    """Drop cached user rows and points after a write"""
+    for user_id in user_ids:
+        USER_CACHE.pop(user_id, None)
+        POINTS_CACHE.pop(user_id, None)
+
+
+async def get_habit_name_cached(habit_id: int):
+    """db.get_habit_name() memoized in HABIT_NAME_CACHE (None for missing habits isn't kept)"""
+    name = HABIT_NAME_CACHE.get(habit_id)
+    if name is None:
+        name = await run_db(db.get_habit_name, habit_id)
+        if name is not None:
+            HABIT_NAME_CACHE[habit_id] = name
+    return name
+
+
+def invalidate_habit_name(habit_id: int):
+    """Forget a habit's cached name after it was renamed or deleted"""
+    HABIT_NAME_CACHE.pop(habit_id, None)
+
+
+async def edit_if_changed(query, text: str, reply_markup=None):
+    """Edit the query's message unless it already shows exactly this text and markup.
+
+    Saves the API round-trip (and the "Message is not modified" error) for no-op
+    re-renders. Telegram strips surrounding whitespace, so compare stripped text.
+    """
+    message = query.message
+    if message is not None and message.text == text.strip() and message.reply_markup == reply_markup:
+        return
+    await query.edit_message_text(text, reply_markup=reply_markup)
@@ -0,0 +1,23 @@
+"""
+Callback data parsing helpers
+"""
+
+
+def callback_id(data: str) -> int:
+    """Numeric id at the end of "<route>_<id>" callback data.
+
+    Only the last '_' matters, so routes may contain underscores of their own
+    (e.g. "confirm_delete_reward_12").
+    """
+    # Slice from the last '_' - no intermediate tuple or list is built
+    return int(data[data.rfind('_') + 1:])
+
+
+def callback_arg(data: str) -> str:
+    """Text argument after the first '_' of "<prefix>_<arg>" callback data.
+
+    Used for single-word prefixes whose argument may itself contain '_'
+    (e.g. "habittype_food_related" -> "food_related"). Unlike str.replace, this
+    only ever strips the prefix.
+    """
+    return data[data.find('_') + 1:]
@@ -0,0 +1,26 @@
+"""
+Run blocking database calls off the event loop
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from database import rollback_thread_connections
+
+# SQLite serializes writers anyway, so a handful of threads is enough
+DB_EXECUTOR = ThreadPoolExecutor(max_workers=5, thread_name_prefix="db")
+
+
+def _call(fn, *args, **kwargs):
+    try:
+        return fn(*args, **kwargs)
+    except BaseException:
+        # Release the write lock of a method that failed mid-transaction right away
+        rollback_thread_connections()
+        raise
+
+
+async def run_db(fn, *args, **kwargs):
+    """Run a blocking Database method in the DB thread pool and await its result"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(DB_EXECUTOR, partial(_call, fn, *args, **kwargs))
@@ -2,28 +2,44 @@
 Text formatting utilities
 """
 
-from database import POINT_TYPES, Database
+from functools import lru_cache
+from database import POINT_TYPE_LABELS
 
-db = Database()
+
+def point_type_label(ptype):
+    """(emoji, display name) for a point type, with a fallback for unknown types"""
+    label = POINT_TYPE_LABELS.get(ptype)
+    if label is None:
+        return '⭐', ptype.replace('_', ' ').title()
+    return label
 
 
 def format_points_display(points_dict):
     """Format points dictionary for display"""
-    lines = []
-    for ptype, emoji in POINT_TYPES.items():
-        amount = points_dict.get(ptype, 0)
-        if amount > 0:
-            type_name = ptype.replace('_', ' ').title()
-            lines.append(f"{emoji} {type_name}: {amount}")
+    if not any(points_dict.values()):
+        return "No points yet"
+    # Keyed by the amounts themselves, so a cached text can never be stale
+    return _format_points(tuple(points_dict.get(ptype, 0) for ptype in POINT_TYPE_LABELS))
 
+
+@lru_cache(maxsize=1024)
+def _format_points(amounts):
+    lines = [
+        f"{emoji} {type_name}: {amount}"
+        for (emoji, type_name), amount in zip(POINT_TYPE_LABELS.values(), amounts)
+        if amount > 0
+    ]
     if not lines:
         return "No points yet"
     return "\n".join(lines)
 
 
-def format_user_name_with_medals(user_id: int, user_name: str) -> str:
-    """Format user name with medal emojis based on medal count"""
-    medal_count = db.get_medal_count(user_id)
+def format_user_name_with_medals(user_name: str, medal_count: int) -> str:
+    """Format user name with medal emojis based on medal count.
+
+    Callers look the counts up themselves (db.get_medal_counts for lists), so no
+    query runs per name and none runs on the event loop.
+    """
     if medal_count == 0:
         return user_name
 
@@ -3,11 +3,10 @@ Keyboard builders for the bot
 """
 
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup
-from database import POINT_TYPES
+from database import POINT_TYPE_LABELS
 
 
-def get_main_menu_keyboard():
-    """Generate main menu keyboard"""
+def _build_main_menu_keyboard():
     keyboard = [
         [InlineKeyboardButton("My Habits", callback_data="my_habits")],
         [InlineKeyboardButton("My Stats", callback_data="my_stats")],
@@ -20,13 +19,11 @@ def get_main_menu_keyboard():
     return InlineKeyboardMarkup(keyboard)
 
 
-def get_habit_type_keyboard():
-    """Generate keyboard for habit type selection (excludes 'any')"""
+def _build_point_type_keyboard(include_any):
     keyboard = []
-    for ptype, emoji in POINT_TYPES.items():
-        if ptype == 'any':  # Skip 'any' for habits
+    for ptype, (emoji, type_name) in POINT_TYPE_LABELS.items():
+        if ptype == 'any' and not include_any:
             continue
-        type_name = ptype.replace('_', ' ').title()
         keyboard.append([InlineKeyboardButton(
             f"{emoji} {type_name}",
             callback_data=f"habittype_{ptype}"
@@ -34,13 +31,25 @@ def get_habit_type_keyboard():
     return InlineKeyboardMarkup(keyboard)
 
 
+# These keyboards never change, so each is built once at import and shared by every
+# request (InlineKeyboardMarkup is immutable)
+MENU_MARKUPS = {
+    'main': _build_main_menu_keyboard(),
+    'habit_type': _build_point_type_keyboard(include_any=False),
+    'reward_point_type': _build_point_type_keyboard(include_any=True),
+}
+
+
+def get_main_menu_keyboard():
+    """Main menu keyboard"""
+    return MENU_MARKUPS['main']
+
+
+def get_habit_type_keyboard():
+    """Keyboard for habit type selection (excludes 'any')"""
+    return MENU_MARKUPS['habit_type']
+
+
 def get_reward_point_type_keyboard():
-    """Generate keyboard for reward point type selection (includes 'any')"""
-    keyboard = []
-    for ptype, emoji in POINT_TYPES.items():
-        type_name = ptype.replace('_', ' ').title()
-        keyboard.append([InlineKeyboardButton(
-            f"{emoji} {type_name}",
-            callback_data=f"habittype_{ptype}"
-        )])
-    return InlineKeyboardMarkup(keyboard)
+    """Keyboard for reward point type selection (includes 'any')"""
+    return MENU_MARKUPS['reward_point_type']
@@ -0,0 +1,61 @@
+"""
+Update processor - concurrent across users, serialized per user
+"""
+
+import asyncio
+from typing import Any, Awaitable, Dict, List, Optional
+from telegram import Update
+from telegram.ext import BaseUpdateProcessor
+
+
+class PerUserUpdateProcessor(BaseUpdateProcessor):
+    """Process updates of different users concurrently, but one at a time per user.
+
+    Everything awaited inside an update is serialized per user, including the
+    (blocking) conversation steps, so a quick second reply or a double tap sees
+    the state the first one left. Only the read-only NON_BLOCKING_ROUTES views
+    are started as tasks and run outside the lock.
+
+    The lock is taken in do_process_update, i.e. after PTB has given the update
+    one of the max_concurrent_updates slots, so a user's queued updates wait
+    while holding slots; the limit is sized well above a single user's burst.
+    """
+
+    def __init__(self, max_concurrent_updates: int):
+        super().__init__(max_concurrent_updates)
+        # user/chat id -> [lock, number of updates holding or waiting for it]
+        self._locks: Dict[int, List] = {}
+
+    @staticmethod
+    def _key(update: object) -> Optional[int]:
+        if not isinstance(update, Update):
+            return None
+        if update.effective_user:
+            return update.effective_user.id
+        if update.effective_chat:
+            return update.effective_chat.id
+        return None
+
+    async def do_process_update(self, update: object, coroutine: Awaitable[Any]) -> None:
+        key = self._key(update)
+        if key is None:
+            await coroutine
+            return
+
+        entry = self._locks.get(key)
+        if entry is None:
+            entry = self._locks[key] = [asyncio.Lock(), 0]
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                await coroutine
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                del self._locks[key]
+
+    async def initialize(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        pass